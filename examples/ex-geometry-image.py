@@ -92,8 +92,7 @@ def ex_geometry_image(ntest) :
     print_ndarr(iY, 'iY')
     print_ndarr(nda, 'nda')
 
-    iX.shape = shape
-    iY.shape = shape
+    iX, iY = iX.reshape(shape), iY.reshape(shape)
     nda.shape = shape
 
     img = img_from_pixel_arrays(iX,iY,W=nda)
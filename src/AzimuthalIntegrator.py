@@ -0,0 +1,186 @@
+#!/usr/bin/env python
+
+"""
+Class :py:class:`AzimuthalIntegrator` - radial and azimuthal integration on detector geometry
+=============================================================================================
+
+Per-pixel radial and azimuthal bin indexes are evaluated once from
+:py:class:`GeometryAccess` pixel coordinates and kept in the geometry cache,
+so integrators with the same binning share them.
+Each event (or stack of events) is integrated with np.bincount.
+
+Usage::
+
+    from PSCalib.GeometryAccess import GeometryAccess
+    from PSCalib.AzimuthalIntegrator import AzimuthalIntegrator
+
+    geometry = GeometryAccess(fname_geometry)
+    azi = AzimuthalIntegrator(geometry, center=(0,0), nrbins=500, rrange=None, nphibins=1, phirange=(-180,180),\
+                              zplane=None, use_zplane=False, use_areas=True, mask=None, do_tilt=True, cframe=0)
+
+    mean, sums, counts = azi.integrate(nda)   # shape=(nrbins,) for nphibins=1, or (nrbins, nphibins)
+    mean, sums, counts = azi.integrate(ndas)  # for stack of events shape=(N,<data-shape>) -> (N,nrbins[,nphibins])
+
+    rcenters   = azi.radial_bin_centers()     # [um]
+    phicenters = azi.phi_bin_centers()        # [degree]
+    rbins, phibins = azi.pixel_bins()         # per-pixel bin indexes of data shape, -1 for pixels out of range
+
+See:
+ * :py:class:`GeometryAccess`
+
+This software was developed for the SIT project.
+If you use all or part of it, please give an appropriate acknowledgment.
+
+Created: 2026-10-16
+"""
+from __future__ import print_function
+from __future__ import division
+
+import logging
+logger = logging.getLogger(__name__)
+
+import numpy as np
+
+
+class AzimuthalIntegrator(object):
+    """Radial/azimuthal integration with per-pixel bin indexes precomputed from geometry.
+
+    Parameters
+
+    - geo : :py:class:`GeometryAccess` - geometry object
+    - center : tuple - (x, y) coordinates [um] of the integration center in the selected frame
+    - nrbins : int - number of radial bins
+    - rrange : tuple - (rmin, rmax) radial range [um], None - from 0 to maximal pixel radius
+    - nphibins : int - number of azimuthal bins
+    - phirange : tuple - (phimin, phimax) azimuthal range [degree]
+    - use_zplane : bool - if True pixel coordinates are projected on zplane by :py:meth:`GeometryAccess.get_pixel_xy_at_z`
+    - zplane : float - z plane [um] for projection, None - mean Z
+    - use_areas : bool - if True counts are sums of pixel areas from :py:meth:`GeometryAccess.get_pixel_areas`
+    - mask : np.array - pixel mask (weights) of data shape, None - all 1
+    - oname, oindex, do_tilt, cframe - the same as in :py:meth:`GeometryAccess.get_pixel_coords`
+    """
+
+    def __init__(self, geo, center=(0,0), nrbins=500, rrange=None, nphibins=1, phirange=(-180,180),\
+                 use_zplane=False, zplane=None, use_areas=True, mask=None,\
+                 oname=None, oindex=0, do_tilt=True, cframe=0):
+
+        self.nrbins = nrbins
+        self.nphibins = nphibins
+        self.phirange = tuple(phirange)
+
+        key = ('azint', oname, oindex, do_tilt, cframe, use_zplane, zplane, tuple(center),\
+               nrbins, None if rrange is None else tuple(rrange), nphibins, self.phirange)
+        v = geo.cache.get(key)
+        if v is None:
+            v = self._pixel_bins(geo, center, rrange, oname, oindex, do_tilt, cframe, use_zplane, zplane)
+            for a in v[:2]: a.setflags(write=False) # shared by integrators with the same binning
+            v = geo.cache.put(key, v)
+        self.rbins, self.phibins, self.rrange = v
+
+        w = np.ones(self.rbins.size, dtype=np.float64) if mask is None else np.asarray(mask, dtype=np.float64).ravel()
+        norm = w * geo.get_pixel_areas(oname, oindex).ravel() if use_areas else w
+
+        rbfl, phbfl = self.rbins.ravel(), self.phibins.ravel()
+        valid = (rbfl>=0) & (phbfl>=0) & (w!=0)
+        self.pixs = np.flatnonzero(valid)
+        self.bins = (rbfl[self.pixs].astype(np.int64)*nphibins + phbfl[self.pixs]).astype(np.int32)
+        self.weights = None if mask is None else w[self.pixs].astype(np.float32)
+        self.nbins = nrbins*nphibins
+        self.npixels = self.rbins.size
+        self.counts = np.bincount(self.bins, weights=norm[self.pixs], minlength=self.nbins)
+        self.counts.setflags(write=False)
+
+
+    def _pixel_bins(self, geo, center, rrange, oname, oindex, do_tilt, cframe, use_zplane, zplane):
+        """Returns per-pixel radial and azimuthal bin index arrays and radial range.
+        """
+        if use_zplane:
+            X, Y = geo.get_pixel_xy_at_z(zplane, oname, oindex, do_tilt, cframe)
+        else:
+            X, Y, Z = geo.get_pixel_coords(oname, oindex, do_tilt, cframe)
+        dx, dy = X - center[0], Y - center[1]
+        R = np.sqrt(dx*dx + dy*dy)
+        Phi = np.degrees(np.arctan2(dy, dx))
+
+        rmin, rmax = (0, R.max()*(1+1e-9)) if rrange is None else rrange
+        return bin_indexes(R, rmin, rmax, self.nrbins),\
+               bin_indexes(Phi, self.phirange[0], self.phirange[1], self.nphibins),\
+               (rmin, rmax)
+
+
+    def pixel_bins(self):
+        """Returns read-only per-pixel radial and azimuthal bin index arrays, -1 for pixels out of range.
+        """
+        return self.rbins, self.phibins
+
+
+    def radial_bin_centers(self):
+        """Returns array of radial bin centers [um].
+        """
+        rmin, rmax = self.rrange
+        return rmin + (np.arange(self.nrbins)+0.5)*(rmax-rmin)/self.nrbins
+
+
+    def phi_bin_centers(self):
+        """Returns array of azimuthal bin centers [degree].
+        """
+        pmin, pmax = self.phirange
+        return pmin + (np.arange(self.nphibins)+0.5)*(pmax-pmin)/self.nphibins
+
+
+    def _shaped(self, arr):
+        shape = (self.nrbins,) if self.nphibins == 1 else (self.nrbins, self.nphibins)
+        return arr.reshape(arr.shape[:-1] + shape)
+
+
+    def integrate(self, nda):
+        """Returns mean, sums, and counts profiles of shape (nrbins,) or (nrbins, nphibins) for data array nda.
+           For stack of events of shape (N,<data-shape>) returns mean and sums of shape (N,<profile-shape>).
+           In each bin sums = sum(I*w) and mean = sums/counts, where counts = sum(area*w) for use_areas=True,
+           or sum(w) otherwise, w - mask weights. Returned counts are read-only.
+        """
+        if nda.size % self.npixels:
+            raise ValueError('AzimuthalIntegrator: data size %d is not multiple of number of pixels in geometry %d'%\
+                             (nda.size, self.npixels))
+        nevts = nda.size // self.npixels
+        data = nda.reshape(nevts, -1)
+        # one bincount per event with shared bin indexes, extra memory is bounded by a single event
+        sums = np.empty((nevts, self.nbins), dtype=np.float64)
+        for i in range(nevts):
+            v = data[i][self.pixs]
+            if self.weights is not None: v *= self.weights
+            sums[i] = np.bincount(self.bins, weights=v, minlength=self.nbins)
+
+        mean = np.zeros_like(sums)
+        np.divide(sums, self.counts, out=mean, where=self.counts>0)
+
+        if nda.size == self.npixels: sums, mean = sums[0], mean[0]
+        return self._shaped(mean), self._shaped(sums), self._shaped(self.counts)
+
+
+def bin_indexes(arr, vmin, vmax, nbins):
+    """Returns int32 array of bin indexes for values in arr, -1 for values out of range [vmin, vmax).
+    """
+    ind = np.floor((arr - vmin) * (nbins/(vmax - vmin)))
+    ind[(ind < 0) | (ind >= nbins)] = -1
+    return ind.astype(np.int32)
+
+
+if __name__ == "__main__":
+    import sys
+    from time import time
+    logging.basicConfig(format='[%(levelname).1s] L%(lineno)04d: %(message)s', level=logging.DEBUG)
+    from PSCalib.GeometryAccess import GeometryAccess
+
+    fname_geometry = sys.argv[1] if len(sys.argv) > 1 else 'geometry.txt'
+    geometry = GeometryAccess(fname_geometry)
+    t0_sec = time()
+    azi = AzimuthalIntegrator(geometry, nrbins=200, nphibins=8)
+    logger.info('AzimuthalIntegrator initialization time %.3f sec' % (time()-t0_sec))
+    nda = np.ones(azi.rbins.shape, dtype=np.float32)
+    t0_sec = time()
+    mean, sums, counts = azi.integrate(nda)
+    logger.info('integration time %.6f sec, profile shape: %s' % (time()-t0_sec, str(mean.shape)))
+    sys.exit('END OF TEST')
+
+# EOF
@@ -22,16 +22,30 @@ Usage::
 
     # get pixel coordinate [um] arrays
     X, Y, Z = geometry.get_pixel_coords(oname=None, oindex=0, do_tilt=True, cframe=0)
+    # returned arrays are non-writeable views of cached arrays, use shape=... for reshaped views
+    # or np.array(X) for writeable copy; they are snapshots of the current geometry, cached arrays are
+    # never changed in place, so arrays returned before move_geo, tilt_geo, or set_geo_pars keep their values
+    X, Y, Z = geometry.get_pixel_coords(shape=(32,185,388))
 
     # get pixel x,y coordinate [um] arrays projected toward origin on specified zplane, if zplane=None then zplane=Z.mean()
-    X, Y = geometry.get_pixel_xy_at_z(zplane=None, oname=None, oindex=0, do_tilt=True)
+    # projected arrays and their indexes are kept per zplane in separate bounded cache geometry.zcache
+    X, Y = geometry.get_pixel_xy_at_z(zplane=None, oname=None, oindex=0, do_tilt=True, cframe=0, dtype=np.float32)
 
     # print a portion of pixel X, Y, and Z coordinate arrays
     geometry.print_pixel_coords(oname=None, oindex=0)
 
-    # get pixel area array; A=1 for regular pixels, =2.5 for wide.
+    # get pixel area array; A=1 for regular pixels, =2.5 for wide, non-writeable view of cached array
     area = geometry.get_pixel_areas(oname=None, oindex=0)
 
+    # get float32 scattering geometry maps for sample at the origin, kept in the cache;
+    # angles [rad], q [1/A] for photon energy [keV], solid angle [sr], polarization factor for
+    # fraction pol_fraction of polarization along the LAB frame X axis
+    tth   = geometry.get_pixel_two_theta(oname=None, oindex=0, do_tilt=True)
+    phi   = geometry.get_pixel_phi(oname=None, oindex=0, do_tilt=True)
+    q     = geometry.get_pixel_q(energy_kev, oname=None, oindex=0, do_tilt=True)
+    omega = geometry.get_pixel_solid_angle(oname=None, oindex=0, do_tilt=True)
+    pol   = geometry.get_pixel_polarization(pol_fraction=1.0, oname=None, oindex=0, do_tilt=True)
+
     # returns (smallest) pixel size [um]
     pixel_size = geometry.get_pixel_scale_size(oname=None, oindex=0)
 
@@ -51,8 +65,13 @@ Usage::
     # mbits = +1-mask edges, +2-wide pixels, +4-non-bonded pixels, +8/+16 - four/eight neighbours of non-bonded
     mask = geometry.get_pixel_mask(oname=None, oindex=0, mbits=0o377)
 
-    # get image martix index arrays for entire detector
-    rows, cols = geometry.get_pixel_coord_indexes(do_tilt=True, cframe=0)
+    # get image martix index arrays for entire detector, non-writeable views of cached arrays
+    rows, cols = geometry.get_pixel_coord_indexes(do_tilt=True, cframe=0, shape=None, dtype=None)
+    # compact indexes: np.uint16 or np.uint32 selected from image size
+    rows, cols = geometry.get_pixel_coord_indexes(dtype='auto')
+
+    # get flat np.int32 image indexes of pixels and image shape (rows, cols)
+    inds, imshape = geometry.get_pixel_flat_indexes(oname=None, oindex=0, pix_scale_size_um=None, xy0_off_pix=None, do_tilt=True, cframe=0)
 
     # get image martix index arrays for specified quad with offset
     rows, cols = geometry.get_pixel_coord_indexes('QUAD:V1', 1, pix_scale_size_um=None, xy0_off_pix=(1000,1000), do_tilt=True, cframe=0)
@@ -64,14 +83,25 @@ Usage::
     irow, icol = geometry.point_coord_indexes(p_um=(0,0))
     # all other parameters should be the same as in get_pixel_coord_indexes method
     irow, icol = geometry.point_coord_indexes(p_um=(0,0), 'QUAD:V1', 1, pix_scale_size_um=None, xy0_off_pix=(1000,1000), do_tilt=True, cframe=0)
+    # vectorized inverse mapping of arrays of coordinates to segment pixel indexes
+    from PSCalib.PixelLocator import PixelLocator
+    seg, row, col, drow, dcol = PixelLocator(geometry, cframe=0).locate(x_um, y_um)
 
     # get 2-d image from index arrays
     img = img_from_pixel_arrays(rows, cols, W=arr)
 
     # conversion of image-like 2-d mask to raw data-like ndarray
     mask_nda = convert_mask2d_to_ndarray(mask2d, rows, cols)
+    # or with precomputed flat indexes
+    from PSCalib.ImageAssembler import ImageAssembler
+    mask_nda = ImageAssembler(geometry).data_from_image(mask2d, dtype=np.uint8)
+
+    # compile immutable GeometryPlan with read-only arrays for fixed options, safe for sharing between threads
+    plan = geometry.compile(oname=None, oindex=0, do_tilt=True, cframe=0, pix_scale_size_um=None, xy0_off_pix=None, mbits=0o377)
+    img = plan.image(nda)
 
     # Get specified object of the class GeometryObject, all objects are kept in the list self.list_of_geos
+    # and indexed in the dict self.dict_of_geos by (oname, oindex)
     geo = geometry.get_geo('QUAD:V1', 1)
     # Get top GeometryObject - the object which includes all other geometry objects
     geo = geometry.get_top_geo()
@@ -84,6 +114,29 @@ Usage::
     geometry.move_geo('QUAD:V1', 1, 10, 20, 0)
     geometry.tilt_geo('QUAD:V1', 1, 0.01, 0, 0)
 
+    # pixel coordinate and index arrays are kept in the LRU cache with memory budget cache_max_mb;
+    # after set_geo_pars, move_geo, and tilt_geo only pixels of the changed object are recomputed
+    # in copies of cached coordinate arrays, which replace them in cache (arrays returned earlier are not changed),
+    # derived index arrays are dropped
+    geometry = GeometryAccess(fname_geometry, cache_max_mb=2000, cache_max_items=32)
+
+    # coordinate, area, mask, and index arrays are also saved in and loaded from .npz files in cache_dir,
+    # file names are keyed by hash of CACHE_FORMAT_VERSION, the geometry text, and use_wide_pix_center,
+    # on-disk cache is not used after set_geo_pars, move_geo, or tilt_geo
+    geometry = GeometryAccess(fname_geometry, cache_dir='./geo-cache')
+
+    # arrays are published in memory-mapped files in shm_dir and attached read-only by other processes
+    # with the same geometry, so node memory does not scale with the number of processes;
+    # files are not removed automatically, use geometry.shm_cache.remove_all()
+    geometry = GeometryAccess(fname_geometry, shm_dir='/dev/shm')
+
+    # segment pixel coordinates are transformed in parallel by nthreads threads, 0 or 1 - sequentially
+    geometry = GeometryAccess(fname_geometry, nthreads=8)
+    geometry.set_nthreads(16)
+    geometry.set_cache_max_mb(500)
+    s = geometry.cache.info()
+    geometry.reset_cash()
+
     # save current geometry parameters in file
     geometry.save_pars_in_file(fname_geometry_new)
 
@@ -104,7 +157,11 @@ See:
  * :py:class:`SegGeometryCspad2x1V1`,
  * :py:class:`SegGeometryEpix100V1`,
  * :py:class:`SegGeometryMatrixV1`,
- * :py:class:`SegGeometryStore`
+ * :py:class:`SegGeometryStore`,
+ * :py:class:`ImageAssembler`,
+ * :py:class:`GeometryPlan`,
+ * :py:class:`PixelLocator`,
+ * :py:class:`AzimuthalIntegrator`
 
 For more detail see `Detector Geometry <https://confluence.slac.stanford.edu/display/PSDM/Detector+Geometry>`_.
 
@@ -121,6 +178,9 @@ import numpy as np
 from math import floor, fabs
 
 from PSCalib.GeometryObject import GeometryObject
+from PSCalib.GeometryPlan import GeometryPlan
+from PSCalib.ImageAssembler import flat_index_dtype
+from PSCalib.UtilsCache import LRUCache, NpzDiskCache, ShmArrayCache, hash_of_text
 
 import logging
 logger = logging.getLogger(__name__)
@@ -140,6 +200,42 @@ def divide_protected(num, den, vsub_zero=0):
     return pro_num / pro_den
 
 
+# affine matrix of coords_psana_to_lab_frame transformation
+MTX_PSANA_TO_LAB = np.array(((0,-1,0,0), (-1,0,0,0), (0,0,-1,0)), dtype=np.float64)
+
+# version of cached array content and format, included in the hash of on-disk and shared memory cache file names;
+# increment it when evaluation of cached arrays or their format changes, so files of older code are not used
+CACHE_FORMAT_VERSION = 1
+
+
+def read_only_view(v, shape=None):
+    """Returns non-writeable view (optionally reshaped) of numpy array v, or tuple of views for tuple of arrays.
+    """
+    if isinstance(v, tuple): return tuple(read_only_view(a, shape) for a in v)
+    if not isinstance(v, np.ndarray): return v
+    w = v.view() if shape is None else v.reshape(shape)
+    w.setflags(write=False)
+    return w
+
+
+def index_dtype(nmax):
+    """Returns the smallest of np.uint16, np.uint32, or np.uint64 dtype for non-negative indexes up to nmax.
+    """
+    return np.uint16 if nmax < 2**16 else np.uint32 if nmax < 2**32 else np.uint64
+
+
+def dtype_key(dtype):
+    """Returns hashable str for dtype or None or 'auto', used in cache keys.
+    """
+    return dtype if dtype is None or dtype == 'auto' else np.dtype(dtype).str
+
+
+def tuple_or_none(v):
+    """Returns hashable tuple for sequence v or None, used in cache keys.
+    """
+    return None if v is None else tuple(v)
+
+
 class GeometryAccess:
     """ :py:class:`GeometryAccess`
     """
@@ -152,13 +248,33 @@ class GeometryAccess:
 
         - path : str - path to the geometry file
         - pbits : int - verbosity bitword
+        - use_wide_pix_center : bool - use geometrical center of wide pixels
+        - cache_max_mb : float - memory budget [MB] for cached pixel coordinate and index arrays
+        - cache_max_items : int - maximal number of cached results
+        - zcache_max_mb : float - memory budget [MB] for cached arrays projected on zplane
+        - zcache_max_items : int - maximal number of cached zplane projection results
+        - cache_dir : str - directory for on-disk .npz cache of arrays, None - do not use on-disk cache
+        - shm_dir : str - directory for arrays shared between processes, e.g. /dev/shm, None - do not share
+        - nthreads : int - number of threads transforming segment pixel coordinates in parallel, 0 or 1 - sequentially
         """
         self.path  = args[0] if len(args)>0 else kwargs.get('path', None)   # positional or optional argument
         self.pbits = args[1] if len(args)>1 else kwargs.get('pbits', 0)     # deprecated, but backward compatable
         self.use_wide_pix_center = kwargs.get('use_wide_pix_center', False) # optional only
+        self.cache_max_mb    = kwargs.get('cache_max_mb', 2000)
+        self.cache_max_items = kwargs.get('cache_max_items', 32)
+        self.zcache_max_mb   = kwargs.get('zcache_max_mb', 500)
+        self.zcache_max_items= kwargs.get('zcache_max_items', 8)
+        self.cache_dir       = kwargs.get('cache_dir', None)
+        self.shm_dir         = kwargs.get('shm_dir', None)
+        self.nthreads        = kwargs.get('nthreads', 0)
+        self.executor   = None
+        self.disk_cache = None
+        self.shm_cache  = None
         self.valid = False
 
         self.list_of_geos = []
+        self.dict_of_geos = {} # (oname, oindex): geo
+        self.reset_cash()
 
         if self.path is None or not os.path.exists(self.path):
             logger.debug('%s: geometry file "%s" does not exist' % (self.__class__.__name__, self.path))
@@ -174,21 +290,36 @@ class GeometryAccess:
 
     def reset_cash(self):
         # Parameters for caching
-        self.geo_old    = None
-        self.oname_old  = None
-        self.oindex_old = None
-        self.tilt_old   = None
-        self.X_old      = None
-        self.Y_old      = None
-        self.Z_old      = None
-        self.rows_old   = None
-        self.cols_old   = None
-        self.irow_old   = None
-        self.icol_old   = None
-        self.p_um_old   = None
-        self.cframe_old = None
-        self.fract_old  = None
         self.sego       = None
+        self.cache = LRUCache(maxbytes=int(self.cache_max_mb*2**20), maxitems=self.cache_max_items)
+        self.zcache = LRUCache(maxbytes=int(self.zcache_max_mb*2**20), maxitems=self.zcache_max_items)
+        self.pcache = LRUCache(maxitems=8) # point indexes, kept apart to not evict arrays
+
+
+    def set_cache_max_mb(self, cache_max_mb):
+        """Sets memory budget [MB] for cached arrays and evicts least recently used arrays if necessary.
+        """
+        self.cache_max_mb = cache_max_mb
+        self.cache.resize(maxbytes=int(cache_max_mb*2**20))
+
+
+    def set_nthreads(self, nthreads):
+        """Sets number of threads transforming segment pixel coordinates in parallel, 0 or 1 - sequentially.
+        """
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+        self.nthreads = nthreads
+
+
+    def _get_executor(self):
+        """Returns ThreadPoolExecutor with self.nthreads workers created on first call, or None for nthreads<2.
+        """
+        if self.nthreads < 2: return None
+        if self.executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+            self.executor = ThreadPoolExecutor(max_workers=self.nthreads)
+        return self.executor
 
 
     def is_valid(self):
@@ -206,11 +337,15 @@ class GeometryAccess:
         self.reset_cash()
         self.dict_of_comments = {}
         self.list_of_geos = []
+        self.dict_of_geos = {} # (oname, oindex): geo
 
         logger.debug('Load file: %s' % self.path)
 
         f=open(self.path,'r')
-        for linef in f:
+        txt = f.read()
+        f.close()
+
+        for linef in txt.split('\n'):
             line = linef.strip('\n')
             logger.debug(line)
             if not line.strip(): continue # discard empty strings
@@ -218,11 +353,10 @@ class GeometryAccess:
                 self._add_comment_to_dict(line)
                 continue
             #geo=self._parse_line(line)
-            self.list_of_geos.append(self._parse_line(line))
-
-        f.close()
+            self._add_geo(self._parse_line(line))
 
         self._set_relations()
+        self._set_file_caches(txt)
         self.valid = True
 
 
@@ -241,6 +375,7 @@ class GeometryAccess:
         self.reset_cash()
         self.dict_of_comments = {}
         self.list_of_geos = []
+        self.dict_of_geos = {} # (oname, oindex): geo
 
         logger.debug('Load text: %s' % s)
 
@@ -252,12 +387,21 @@ class GeometryAccess:
                 self._add_comment_to_dict(line)
                 continue
             #geo=self._parse_line(line)
-            self.list_of_geos.append(self._parse_line(line))
+            self._add_geo(self._parse_line(line))
 
         self._set_relations()
+        self._set_file_caches(s)
         self.valid = True
 
 
+    def _set_file_caches(self, txt):
+        """Sets on-disk and shared memory caches for geometry text if cache_dir and shm_dir are specified.
+        """
+        prefix = 'geo-' + hash_of_text('cache-format-v%d' % CACHE_FORMAT_VERSION, txt, self.use_wide_pix_center)
+        self.disk_cache = None if self.cache_dir is None else NpzDiskCache(self.cache_dir, prefix)
+        self.shm_cache  = None if self.shm_dir   is None else ShmArrayCache(self.shm_dir, prefix)
+
+
     def save_pars_in_file(self, path):
         """Save geometry file with current content.
         """
@@ -339,21 +483,25 @@ class GeometryAccess:
         return GeometryObject(**d)
 
 
+    def _add_geo(self, geo):
+        """Adds geometry object to the list_of_geos and to the dict_of_geos index keyed by (oname, oindex).
+        """
+        self.list_of_geos.append(geo)
+        if geo is not None: self.dict_of_geos.setdefault((geo.oname, geo.oindex), geo)
+
+
     def _find_parent(self, geobj):
         """Finds and returns parent for geobj geometry object.
         """
-        for geo in self.list_of_geos:
-            if geo == geobj: continue
-            if  geo.oindex == geobj.pindex \
-            and geo.oname  == geobj.pname:
-                return geo
+        geo = self.dict_of_geos.get((geobj.pname, geobj.pindex), None)
+        if geo is not None and geo is not geobj: return geo
 
         # The name of parent object is not found among geo names in the self.list_of_geos
         # add top parent object to the list
         if geobj.pname is not None:
             top_parent = GeometryObject(pname=None, pindex=0, oname=geobj.pname, oindex=geobj.pindex,\
                                         use_wide_pix_center=self.use_wide_pix_center)
-            self.list_of_geos.append(top_parent)
+            self._add_geo(top_parent)
             return top_parent
 
         return None # for top parent itself
@@ -378,17 +526,7 @@ class GeometryAccess:
         """Returns specified geometry object.
         """
         if not self.valid: return None
-
-        if oindex == self.oindex_old and oname == self.oname_old: return self.geo_old
-
-        for geo in self.list_of_geos:
-            if  geo.oindex == oindex \
-            and geo.oname  == oname:
-                self.oindex_old = oindex
-                self.oname_old  = oname
-                self.geo_old    = geo
-                return geo
-        return None
+        return self.dict_of_geos.get((oname, oindex), None)
 
 
     def get_top_geo(self):
@@ -423,50 +561,57 @@ class GeometryAccess:
         return np.array(-y), np.array(-x), np.array(-z)
 
 
-    def get_pixel_coords(self, oname=None, oindex=0, do_tilt=True, cframe=0):
+    def get_pixel_coords(self, oname=None, oindex=0, do_tilt=True, cframe=0, shape=None):
         """Returns three pixel X,Y,Z coordinate arrays for top or specified geometry object.
+           Arrays are non-writeable views of cached arrays, reshaped to shape if specified,
+           and snapshots of the current geometry: they do not change after later geometry modifications.
         """
         if not self.valid: return None
 
-        if  oindex  == self.oindex_old\
-        and oname   == self.oname_old\
-        and do_tilt == self.tilt_old\
-        and cframe  == self.cframe_old:
-            return self.X_old, self.Y_old, self.Z_old
-
-        geo = self.get_top_geo() if oname is None else self.get_geo(oname, oindex)
-        if logger.getEffectiveLevel() == logging.DEBUG:
-            logger.debug('get_pixel_coords(...) for geo:')
-            geo.print_geo_children();
+        def func():
+            geo = self.get_top_geo() if oname is None else self.get_geo(oname, oindex)
+            if logger.getEffectiveLevel() == logging.DEBUG:
+                logger.debug('get_pixel_coords(...) for geo:')
+                geo.print_geo_children();
 
-        x,y,z = geo.get_pixel_coords(do_tilt)
-        self.X_old, self.Y_old, self.Z_old = self.coords_psana_to_lab_frame(x,y,z) if cframe>0 else (x,y,z)
-        self.tilt_old = do_tilt
-        self.cframe_old = cframe
-        return self.X_old, self.Y_old, self.Z_old
+            x,y,z = geo.get_pixel_coords(do_tilt, executor=self._get_executor())
+            return self.coords_psana_to_lab_frame(x,y,z) if cframe>0 else (x,y,z)
+        return self._cached_value(('xyz', oname, oindex, do_tilt, cframe), func, shape)
 
 
-    def get_pixel_xy_at_z(self, zplane=None, oname=None, oindex=0, do_tilt=True, cframe=0):
+    def get_pixel_xy_at_z(self, zplane=None, oname=None, oindex=0, do_tilt=True, cframe=0, dtype=None):
         """Returns pixel coordinate arrays XatZ, YatZ, for specified zplane and geometry object.
 
            This method projects pixel X, Y coordinates in 3-D
            on the specified Z plane along direction to origin.
+           Projected arrays are kept per zplane in the bounded cache self.zcache.
+           dtype - data type of returned arrays, e.g. np.float32, None - the same as for pixel coordinates.
         """
         if not self.valid: return None, None
 
-        X, Y, Z = self.get_pixel_coords(oname, oindex, do_tilt, cframe)
-        if X is None: return None, None
-        Z0 = Z.mean() if zplane is None else zplane
-        if fabs(Z0) < 1000: return X, Y
+        def func():
+            X, Y, Z = self.get_pixel_coords(oname, oindex, do_tilt, cframe)
+            Z0 = Z.mean() if zplane is None else zplane
+            if fabs(Z0) < 1000:
+                return (X, Y) if dtype is None else (X.astype(dtype), Y.astype(dtype))
+
+            #from Detector.GlobalUtils import info_ndarr
+            #logger.debug(info_ndarr(Z, 'get_pixel_xy_at_z Z'))
+            logger.debug('get_pixel_xy_at_z Z.shape %s' % str(Z.shape))
+            logger.debug('Z plane %f' % Z0)
 
-        #from Detector.GlobalUtils import info_ndarr
-        #logger.debug(info_ndarr(Z, 'get_pixel_xy_at_z Z'))
-        logger.debug('get_pixel_xy_at_z Z.shape %s' % str(Z.shape))
-        logger.debug('Z plane %f' % Z0)
+            # Z0 * divide_protected(X,Z) evaluated in place
+            nonzero = Z!=0
+            xy = []
+            for A in (X, Y):
+                AatZ = np.zeros(A.shape, dtype=A.dtype if dtype is None else dtype)
+                np.divide(A, Z, out=AatZ, where=nonzero)
+                AatZ *= Z0
+                xy.append(AatZ)
+            return tuple(xy)
 
-        XatZ = Z0 * divide_protected(X,Z)
-        YatZ = Z0 * divide_protected(Y,Z)
-        return XatZ, YatZ
+        key = ('xyatz', zplane, oname, oindex, do_tilt, cframe, dtype_key(dtype))
+        return self._cached_value(key, func, cache=self.zcache)
 
 
     def get_pixel_areas(self, oname=None, oindex=0):
@@ -474,7 +619,94 @@ class GeometryAccess:
         """
         if not self.valid: return None
         geo = self.get_top_geo() if oname is None else self.get_geo(oname, oindex)
-        return geo.get_pixel_areas()
+        return self._cached_value(('area', oname, oindex), geo.get_pixel_areas)
+
+
+    def _lab_coords_f32(self, oname=None, oindex=0, do_tilt=True):
+        """Returns float32 pixel X,Y,Z coordinate arrays [um] in the LAB frame.
+        """
+        return [a.astype(np.float32) for a in self.get_pixel_coords(oname, oindex, do_tilt, cframe=1)]
+
+
+    def _cached_value(self, key, func, shape=None, cache=None):
+        """Returns value for key from memory cache, or shared memory, or on-disk cache,
+           or evaluated by func(). Evaluated value is saved in all enabled caches.
+           Returned arrays are non-writeable views of cached arrays, reshaped to shape if specified.
+           Cached arrays are never modified in place, so returned arrays are snapshots.
+           cache - memory cache, None - self.cache.
+        """
+        if cache is None: cache = self.cache
+        v = cache.get(key)
+        if v is not None: return read_only_view(v, shape)
+        if self.shm_cache is not None:
+            v = self.shm_cache.get(key)
+            if v is not None: return read_only_view(cache.put(key, v), shape)
+        if self.disk_cache is not None:
+            v = self.disk_cache.get(key)
+            if v is None: v = self.disk_cache.put(key, func())
+        else:
+            v = func()
+        if self.shm_cache is not None: v = self.shm_cache.put(key, v)
+        return read_only_view(cache.put(key, v), shape)
+
+
+    def get_pixel_two_theta(self, oname=None, oindex=0, do_tilt=True):
+        """Returns float32 array of pixel scattering angles 2-theta [rad] for sample at the origin.
+        """
+        if not self.valid: return None
+        def func():
+            x, y, z = self._lab_coords_f32(oname, oindex, do_tilt)
+            return np.arctan2(np.hypot(x, y), np.abs(z))
+        return self._cached_value(('tth', oname, oindex, do_tilt), func)
+
+
+    def get_pixel_phi(self, oname=None, oindex=0, do_tilt=True):
+        """Returns float32 array of pixel azimuthal angles phi [rad] in the LAB frame, phi=0 along X.
+        """
+        if not self.valid: return None
+        def func():
+            x, y, z = self._lab_coords_f32(oname, oindex, do_tilt)
+            return np.arctan2(y, x)
+        return self._cached_value(('phi', oname, oindex, do_tilt), func)
+
+
+    def get_pixel_q(self, energy_kev, oname=None, oindex=0, do_tilt=True):
+        """Returns float32 array of pixel momentum transfer values q=4*pi*sin(theta)/lambda [1/A]
+           for photon energy [keV].
+        """
+        if not self.valid: return None
+        def func():
+            tth = self.get_pixel_two_theta(oname, oindex, do_tilt)
+            return np.float32(4*np.pi*energy_kev/12.398419843) * np.sin(tth/2)
+        return self._cached_value(('q', energy_kev, oname, oindex, do_tilt), func)
+
+
+    def get_pixel_solid_angle(self, oname=None, oindex=0, do_tilt=True):
+        """Returns float32 array of pixel solid angles [sr] for sample at the origin,
+           omega = area*|Z|/R**3, where pixel normal is assumed along the beam.
+        """
+        if not self.valid: return None
+        def func():
+            x, y, z = self._lab_coords_f32(oname, oindex, do_tilt)
+            psize = self.get_pixel_scale_size(oname, oindex)
+            area = self.get_pixel_areas(oname, oindex).astype(np.float32) * np.float32(psize*psize)
+            r2 = x*x + y*y + z*z
+            return area * np.abs(z) / (r2*np.sqrt(r2))
+        return self._cached_value(('solid', oname, oindex, do_tilt), func)
+
+
+    def get_pixel_polarization(self, pol_fraction=1.0, oname=None, oindex=0, do_tilt=True):
+        """Returns float32 array of pixel polarization factors
+           P = f*(1 - sin(2theta)**2 * cos(phi)**2) + (1-f)*(1 - sin(2theta)**2 * sin(phi)**2),
+           where f=pol_fraction is a fraction of polarization along the LAB X axis (horizontal).
+        """
+        if not self.valid: return None
+        def func():
+            s2 = np.sin(self.get_pixel_two_theta(oname, oindex, do_tilt))**2
+            c2phi = np.cos(self.get_pixel_phi(oname, oindex, do_tilt))**2
+            f = np.float32(pol_fraction)
+            return 1 - s2*(f*c2phi + (1-f)*(1-c2phi))
+        return self._cached_value(('pol', pol_fraction, oname, oindex, do_tilt), func)
 
 
     def get_pixel_mask(self, oname=None, oindex=0, mbits=0o377, **kwargs):
@@ -488,7 +720,8 @@ class GeometryAccess:
         """
         if not self.valid: return None
         geo = self.get_top_geo() if oname is None else self.get_geo(oname, oindex)
-        return geo.get_pixel_mask(mbits=mbits, **kwargs)
+        key = ('mask', oname, oindex, mbits, tuple(sorted(kwargs.items())))
+        return np.array(self._cached_value(key, lambda: geo.get_pixel_mask(mbits=mbits, **kwargs)))
 
 
     def get_pixel_scale_size(self, oname=None, oindex=0):
@@ -511,7 +744,8 @@ class GeometryAccess:
         """
         if not self.valid: return None
         geo = self.get_top_geo() if oname is None else self.get_geo(oname, oindex)
-        return geo.set_geo_pars(x0, y0, z0, rot_z, rot_y, rot_x, tilt_z, tilt_y, tilt_x)
+        geo.set_geo_pars(x0, y0, z0, rot_z, rot_y, rot_x, tilt_z, tilt_y, tilt_x)
+        self._update_cache_for_moved(geo)
 
 
     def move_geo(self, oname=None, oindex=0, dx=0, dy=0, dz=0):
@@ -519,7 +753,8 @@ class GeometryAccess:
         """
         if not self.valid: return None
         geo = self.get_top_geo() if oname is None else self.get_geo(oname, oindex)
-        return geo.move_geo(dx, dy, dz)
+        geo.move_geo(dx, dy, dz)
+        self._update_cache_for_moved(geo)
 
 
     def tilt_geo(self, oname=None, oindex=0, dt_x=0, dt_y=0, dt_z=0):
@@ -527,7 +762,32 @@ class GeometryAccess:
         """
         if not self.valid: return None
         geo = self.get_top_geo() if oname is None else self.get_geo(oname, oindex)
-        return geo.tilt_geo(dt_x, dt_y, dt_z)
+        geo.tilt_geo(dt_x, dt_y, dt_z)
+        self._update_cache_for_moved(geo)
+
+
+    def _update_cache_for_moved(self, geo):
+        """Updates cached arrays after change of geometry object geo parameters.
+           Cached pixel coordinates of ancestors of geo are copied, updated only for pixels of geo,
+           and the copies replace cached arrays (copy-on-write), so arrays returned earlier do not change.
+           Cached coordinates of objects which do not contain geo are kept, other derived arrays are dropped.
+        """
+        self.disk_cache = None # geometry is different from its text
+        self.shm_cache  = None
+        self.zcache.clear()
+        self.pcache.clear()
+        for key in self.cache.keys():
+            if key[0] in ('area', 'mask'): continue
+            if key[0] == 'xyz':
+                _, oname, oindex, do_tilt, cframe = key
+                top = self.get_top_geo() if oname is None else self.get_geo(oname, oindex)
+                if top is not geo and geo.get_path_from(top) is None: continue
+                xyz = tuple(np.array(o) for o in self.cache.get(key))
+                if top.update_pixel_coords(tuple(o.reshape(-1) for o in xyz), geo, do_tilt,\
+                                           MTX_PSANA_TO_LAB if cframe>0 else None):
+                    self.cache.put(key, xyz)
+                    continue
+            self.cache.pop(key)
 
 
     def info_list_of_geos(self, cmt='info_list_of_geos():\n'):
@@ -580,7 +840,7 @@ class GeometryAccess:
     def xy_to_rc_point(self, X, Y, p_um=(0,0), pix_scale_size_um=None, xy0_off_pix=None, cframe=0, fract=False):
         if X is None or Y is None: return None, None
 
-        x_um, y_um = self.p_um_old = p_um
+        x_um, y_um = p_um
         pix_size = self.get_pixel_scale_size() if pix_scale_size_um is None else pix_scale_size_um
 
         if cframe==1: #LAB frame z-along the beam, y-nodir, x=[y,z]
@@ -604,58 +864,92 @@ class GeometryAccess:
             return int(floor((x_um-xmin)/pix_size)), int(floor((y_um-ymin)/pix_size))
 
 
-    def xy_to_rc_arrays(self, X, Y, pix_scale_size_um=None, xy0_off_pix=None, cframe=0):
+    def xy_to_rc_arrays(self, X, Y, pix_scale_size_um=None, xy0_off_pix=None, cframe=0, xy_ref=None, fract=False, dtype=None):
         """Returns image martix rows and columns arrays evaluated from X,Y coordinate arrays.
+
+           xy_ref - tuple of X, Y arrays defining image origin, None - X, Y
+           fract - if True returns float rows and columns
+           dtype - data type of integer indexes, None - np.uint,
+                   'auto' - the smallest of np.uint16 or np.uint32 sufficient for the image size
         """
         if X is None or Y is None: return None, None
 
+        if dtype == 'auto':
+            rows, cols = self.xy_to_rc_arrays(X, Y, pix_scale_size_um, xy0_off_pix, cframe, xy_ref, fract=True)
+            dtype = index_dtype(max(rows.max(), cols.max()))
+            return rows.astype(dtype), cols.astype(dtype)
+
         pix_size = self.get_pixel_scale_size() if pix_scale_size_um is None else pix_scale_size_um
+        Xref, Yref = (X, Y) if xy_ref is None else xy_ref
+        dtype = np.float64 if fract else np.uint if dtype is None else dtype
 
         if cframe>0: #LAB frame z-along the beam, y-nodir, x=[y,z]
-            xmin, ymax = X.min(), Y.max()
+            xmin, ymax = Xref.min(), Yref.max()
             if xy0_off_pix is not None:
                 # Offset in pix -> um
                 if xy0_off_pix[0]>0: xmin -= xy0_off_pix[0] * pix_size
                 if xy0_off_pix[1]>0: ymax += xy0_off_pix[1] * pix_size
             xmin, ymax = xmin-pix_size/2, ymax+pix_size/2
-            return np.array((ymax-Y)/pix_size, dtype=np.uint), np.array((X-xmin)/pix_size, dtype=np.uint)
+            return np.array((ymax-Y)/pix_size, dtype=dtype), np.array((X-xmin)/pix_size, dtype=dtype)
 
         else: # PSANA image-matrix frame - x-along gravity(rows), y-right(columns), z=[x,y]-opposite to the beam
-            xmin, ymin = X.min(), Y.min()
+            xmin, ymin = Xref.min(), Yref.min()
             if xy0_off_pix is not None:
                 # Offset in pix -> um
                 if xy0_off_pix[0]>0: xmin -= xy0_off_pix[0] * pix_size
                 if xy0_off_pix[1]>0: ymin -= xy0_off_pix[1] * pix_size
             xmin, ymin = xmin-pix_size/2, ymin-pix_size/2
-            return np.array((X-xmin)/pix_size, dtype=np.uint), np.array((Y-ymin)/pix_size, dtype=np.uint)
+            return np.array((X-xmin)/pix_size, dtype=dtype), np.array((Y-ymin)/pix_size, dtype=dtype)
 
 
-    def get_pixel_coord_indexes(self, oname=None, oindex=0, pix_scale_size_um=None, xy0_off_pix=None, do_tilt=True, cframe=0):
+    def get_pixel_coord_indexes(self, oname=None, oindex=0, pix_scale_size_um=None, xy0_off_pix=None, do_tilt=True, cframe=0, shape=None, dtype=None):
         """Returns image martix rows and columns arrays evaluated from X,Y coordinate arrays for top or specified geometry object.
+           Arrays are non-writeable views of cached arrays, reshaped to shape if specified,
+           and snapshots of the current geometry: they do not change after later geometry modifications.
+           dtype - index data type, None - np.uint, 'auto' - np.uint16 or np.uint32 depending on image size.
         """
         if not self.valid: return None, None
 
-        if  oindex  == self.oindex_old\
-        and oname   == self.oname_old\
-        and do_tilt == self.tilt_old\
-        and cframe  == self.cframe_old\
-        and pix_scale_size_um is None\
-        and xy0_off_pix is None\
-        and self.rows_old is not None:
-            return self.rows_old, self.cols_old
+        def func():
+            X, Y, Z = self.get_pixel_coords(oname, oindex, do_tilt, cframe)
+            return self.xy_to_rc_arrays(X, Y, pix_scale_size_um, xy0_off_pix, cframe, dtype=dtype)
+        key = ('rc', oname, oindex, pix_scale_size_um, tuple_or_none(xy0_off_pix), do_tilt, cframe, dtype_key(dtype))
+        return self._cached_value(key, func, shape)
 
-        X, Y, Z = self.get_pixel_coords(oname, oindex, do_tilt, cframe)
-        self.rows_old, self.cols_old = self.xy_to_rc_arrays(X, Y, pix_scale_size_um, xy0_off_pix, cframe)
-        return self.rows_old, self.cols_old
 
+    def get_pixel_flat_indexes(self, oname=None, oindex=0, pix_scale_size_um=None, xy0_off_pix=None, do_tilt=True, cframe=0):
+        """Returns flat image index array of data shape and image shape (rows, cols).
+           Indexes are np.int32, or np.int64 for images with more than 2**31 pixels,
+           index array is a non-writeable view of cached array and a snapshot of the current geometry.
+        """
+        if not self.valid: return None, None
+
+        def func():
+            rows, cols = self.get_pixel_coord_indexes(oname, oindex, pix_scale_size_um, xy0_off_pix, do_tilt, cframe, dtype='auto')
+            shape = (int(rows.max())+1, int(cols.max())+1)
+            dtype = flat_index_dtype(shape[0]*shape[1])
+            inds = rows.astype(dtype)
+            inds *= shape[1]
+            inds += cols
+            return inds, np.array(shape)
+        key = ('flat', oname, oindex, pix_scale_size_um, tuple_or_none(xy0_off_pix), do_tilt, cframe)
+        inds, shape = self._cached_value(key, func)
+        return inds, tuple(int(v) for v in shape)
 
-    def get_pixel_xy_inds_at_z(self, zplane=None, oname=None, oindex=0, pix_scale_size_um=None, xy0_off_pix=None, do_tilt=True, cframe=0):
+
+    def get_pixel_xy_inds_at_z(self, zplane=None, oname=None, oindex=0, pix_scale_size_um=None, xy0_off_pix=None, do_tilt=True, cframe=0, shape=None, dtype=None):
         """Returns pixel coordinate index arrays rows, cols of size for specified zplane and geometry object.
+           Arrays are non-writeable views of cached arrays, reshaped to shape if specified,
+           and snapshots of the current geometry: they do not change after later geometry modifications.
+           dtype - index data type, None - np.uint, 'auto' - np.uint16 or np.uint32 depending on image size.
         """
         if not self.valid: return None, None
-        X, Y = self.get_pixel_xy_at_z(zplane, oname, oindex, do_tilt, cframe)
-        self.rows_old, self.cols_old = self.xy_to_rc_arrays(X, Y, pix_scale_size_um, xy0_off_pix, cframe)
-        return self.rows_old, self.cols_old
+
+        def func():
+            X, Y = self.get_pixel_xy_at_z(zplane, oname, oindex, do_tilt, cframe)
+            return self.xy_to_rc_arrays(X, Y, pix_scale_size_um, xy0_off_pix, cframe, dtype=dtype)
+        key = ('rcz', zplane, oname, oindex, pix_scale_size_um, tuple_or_none(xy0_off_pix), do_tilt, cframe, dtype_key(dtype))
+        return self._cached_value(key, func, shape, cache=self.zcache)
 
 
     def point_coord_indexes(self, p_um=(0,0), oname=None, oindex=0, pix_scale_size_um=None, xy0_off_pix=None, do_tilt=True, cframe=0, fract=False):
@@ -665,21 +959,19 @@ class GeometryAccess:
         """
         if not self.valid: return None, None
 
-        if  oindex  == self.oindex_old\
-        and oname   == self.oname_old\
-        and do_tilt == self.tilt_old\
-        and p_um    == self.p_um_old\
-        and cframe  == self.cframe_old\
-        and fract   == self.fract_old\
-        and pix_scale_size_um is None\
-        and xy0_off_pix is None\
-        and self.irow_old is not None:
-            return self.irow_old, self.icol_old
+        key = ('point', tuple(p_um), oname, oindex, pix_scale_size_um, tuple_or_none(xy0_off_pix), do_tilt, cframe, fract)
+        rc = self.pcache.get(key)
+        if rc is not None: return rc
 
         X, Y, Z = self.get_pixel_coords(oname, oindex, do_tilt, cframe)
-        self.irow_old, self.icol_old = self.xy_to_rc_point(X, Y, p_um, pix_scale_size_um, xy0_off_pix, cframe, fract)
-        self.fract_old = fract
-        return self.irow_old, self.icol_old
+        return self.pcache.put(key, self.xy_to_rc_point(X, Y, p_um, pix_scale_size_um, xy0_off_pix, cframe, fract))
+
+
+    def compile(self, oname=None, oindex=0, do_tilt=True, cframe=0, pix_scale_size_um=None, xy0_off_pix=None, mbits=0o377):
+        """Returns immutable :py:class:`GeometryPlan` with read-only coordinate, index, area, and mask arrays
+           for specified options, which can be shared between threads.
+        """
+        return GeometryPlan(self, oname, oindex, do_tilt, cframe, pix_scale_size_um, xy0_off_pix, mbits)
 
 
     def set_print_bits(self, pbits=0):
@@ -808,7 +1100,7 @@ def convert_mask2d_to_ndarray(mask2d, rows, cols, dtype=np.uint8):
     assert isinstance(rows, np.ndarray)
     assert isinstance(cols, np.ndarray)
     assert cols.shape == rows.shape
-    return np.array([mask2d[r,c] for r,c in zip(rows, cols)], dtype=dtype)
+    return np.asarray(mask2d[rows, cols], dtype=dtype)
 
 
 #----------- TESTS ------------
@@ -34,11 +34,21 @@ Usage::
     pname  = geo.get_parent_name()
     pindex = geo.get_parent_index()
     X,Y,Z  = geo.get_pixel_coords(do_tilt=True)
+    # coordinates of points defined in segment frame by function seg_coords(sg) -> x,y,z arrays
+    X,Y,Z  = geo.get_pixel_coords(do_tilt=True, seg_coords=seg_coords)
+    # segments transformed in parallel by concurrent.futures executor
+    X,Y,Z  = geo.get_pixel_coords(do_tilt=True, executor=ThreadPoolExecutor(max_workers=8))
     X,Y    = geo.get_2d_pixel_coords(do_tilt=True)
+    X,Y    = geo.get_2d_pixel_coords(do_tilt=True, shaped=True) # of shape get_shape_geo_array()
     area   = geo.get_pixel_area()
     #mbits = +1-edges, +2-wide pixels, +4-non-bonded pixels, +8/+16 - four/eight neighbours of non-bonded
     mask   = geo.get_pixel_mask(mbits=0o377)
     npixels= geo.get_size_geo_array()
+    shape  = geo.get_shape_geo_array()
+    list_of_segs = geo.get_list_of_segments()
+    path   = geo.get_path_from(ancestor) # [ancestor, ..., geo] or None
+    # recompute in place only slice of descendant geometry object in flat arrays of self pixel coordinates
+    status = geo.update_pixel_coords((X.ravel(), Y.ravel(), Z.ravel()), descendant, do_tilt=True)
     pixsize= geo.get_pixel_scale_size()
     x0, y0, z0             = geo.get_origin()
     rot_z, rot_y, rot_x    = geo.get_rot()
@@ -49,10 +59,18 @@ Usage::
     geo.add_child(child)
     Xt, Yt, Zt = geo.transform_geo_coord_arrays(X, Y, Z, do_tilt=True)
     Xt, Yt     = geo.transform_2d_geo_coord_arrays(X, Y, do_tilt=True)
+    M = geo.transform_matrix(do_tilt=True) # 3x4 affine matrix [R|t] to the parent frame
+    M = geo.transform_matrix_2d(do_tilt=True) # 2x3 affine matrix for 2-d case
 
     # global methods:
     Xrot, Yrot = rotation_cs(X, Y, C, S)
     Xrot, Yrot = rotation(X, Y, angle_deg)
+    R = rotation_matrix(angle_z, angle_y, angle_x)
+    M = affine_matrix(R, (x0, y0, z0))
+    M = compose_affine(M1, M2) # M1(M2(v))
+    Xt, Yt, Zt = apply_affine(M, X, Y, Z)
+    apply_affine(M, X, Y, Z, out=(Xt, Yt, Zt)) # fills preallocated arrays
+    Xt, Yt = apply_affine_2d(M, X, Y, out=None)
 
     # global methods only for CSPAD2x2 array conversion between (2,185,388) and (185,388,2):
     arrTwo2x1 = data2x2ToTwo2x1(asData2x2)
@@ -92,6 +110,62 @@ def rotation(X, Y, angle_deg):
     return rotation_cs(X, Y, C, S)
 
 
+def rotation_matrix(angle_z, angle_y, angle_x):
+    """Returns 3x3 rotation matrix for angles [degree] applied sequentially around z, y, and x axes,
+       the same as in GeometryObject.transform_geo_coord_arrays.
+    """
+    sz, cz = sin(radians(angle_z)), cos(radians(angle_z))
+    sy, cy = sin(radians(angle_y)), cos(radians(angle_y))
+    sx, cx = sin(radians(angle_x)), cos(radians(angle_x))
+    Rz = np.array(((cz,-sz, 0), (sz, cz, 0), (  0,  0, 1)))
+    Ry = np.array(((cy,  0,sy), ( 0,  1, 0), (-sy,  0,cy)))
+    Rx = np.array(((1,   0, 0), ( 0, cx,-sx), ( 0, sx,cx)))
+    return np.dot(Rx, np.dot(Ry, Rz))
+
+
+def affine_matrix(R, t):
+    """Returns 3x4 (or 2x3 for 2-d) affine matrix [R|t] for 3x3 (2x2) rotation matrix R and translation vector t.
+    """
+    n = len(t)
+    M = np.empty((n,n+1))
+    M[:,:n] = R
+    M[:,n] = t
+    return M
+
+
+def compose_affine(M1, M2):
+    """Returns 3x4 (or 2x3) affine matrix of transformation M1(M2(v)).
+    """
+    R1, t1 = M1[:,:-1], M1[:,-1]
+    return affine_matrix(np.dot(R1, M2[:,:-1]), np.dot(R1, M2[:,-1]) + t1)
+
+
+def apply_affine(M, X, Y, Z, out=None):
+    """Returns X, Y, Z numpy arrays transformed by 3x4 affine matrix M in one pass.
+       If out=(Xt, Yt, Zt) is specified, results are written in these preallocated arrays of X shape.
+    """
+    if out is None:
+        return tuple(M[i,0]*X + M[i,1]*Y + M[i,2]*Z + M[i,3] for i in range(3))
+    for i, o in enumerate(out):
+        np.multiply(X, M[i,0], out=o)
+        o += M[i,1]*Y
+        o += M[i,2]*Z
+        o += M[i,3]
+    return out
+
+
+def apply_affine_2d(M, X, Y, out=None):
+    """2-d version of apply_affine for 2x3 affine matrix M.
+    """
+    if out is None:
+        return tuple(M[i,0]*X + M[i,1]*Y + M[i,2] for i in range(2))
+    for i, o in enumerate(out):
+        np.multiply(X, M[i,0], out=o)
+        o += M[i,1]*Y
+        o += M[i,2]
+    return out
+
+
 class GeometryObject(object):
 
     def __init__(self, pname=None, pindex=None,\
@@ -249,65 +323,123 @@ class GeometryObject(object):
         return Xt, Yt, Zt
 
 
-    def get_pixel_coords(self, do_tilt=True):
+    def transform_matrix(self, do_tilt=True):
+        """ Returns 3x4 affine matrix [R|t] of transformation from self to the parent frame,
+            equivalent to transform_geo_coord_arrays.
+        """
+        angle_z = self.rot_z + self.tilt_z if do_tilt else self.rot_z
+        angle_y = self.rot_y + self.tilt_y if do_tilt else self.rot_y
+        angle_x = self.rot_x + self.tilt_x if do_tilt else self.rot_x
+        return affine_matrix(rotation_matrix(angle_z, angle_y, angle_x), (self.x0, self.y0, self.z0))
+
+
+    def get_pixel_coords(self, do_tilt=True, mtx=None, seg_coords=None, executor=None):
         """ Returns three numpy arrays with pixel X, Y, Z coordinates for self geometry object.
+
+            Transformations of all levels are composed in a single affine matrix per segment,
+            so pixel arrays of each segment are transformed once.
+            mtx - 3x4 affine matrix from the parent frame to the output frame, None - output in the parent frame.
+            seg_coords - function seg_coords(sg) returning X, Y, Z arrays of points in the segment frame
+                         for SegGeometry object sg, None - sg.pixel_coord_axes() broadcast to the segment shape.
+            executor - concurrent.futures executor, e.g. ThreadPoolExecutor, transforming segments in parallel
+                       into their slices of output arrays, None - segments are transformed sequentially.
+        """
+        M = self.transform_matrix(do_tilt)
+        if mtx is not None: M = compose_affine(mtx, M)
+
+        size = self.get_size_geo_array()
+        out = (np.empty(size), np.empty(size), np.empty(size))
+        if executor is None:
+            self._fill_pixel_coords(out, M, do_tilt, seg_coords)
+        else:
+            tasks, shuffles = [], []
+            self._collect_pixel_coord_tasks(out, M, do_tilt, tasks, shuffles)
+            futures = [executor.submit(seg._fill_pixel_coords, o, Mseg, do_tilt, seg_coords) for seg, o, Mseg in tasks]
+            for f in futures: f.result()
+            for obj, o in shuffles:
+                for a in o: obj._shuffle_in_place(a)
+        shape = self.get_shape_geo_array()
+        return tuple(o.reshape(shape) for o in out)
+
+
+    def _seg_coords(self, seg_coords=None):
+        return self.algo.pixel_coord_axes() if seg_coords is None else seg_coords(self.algo)
+
+
+    def _fill_pixel_coords(self, out, M, do_tilt=True, seg_coords=None):
+        """ Fills flat preallocated arrays out=(X, Y, Z) of self size with pixel coordinates
+            of self object transformed by 3x4 affine matrix M.
         """
         if self.algo is not None:
-            xac, yac, zac = self.algo.pixel_coord_array()
-            return self.transform_geo_coord_arrays(xac, yac, zac, do_tilt)
+            xac, yac, zac = self._seg_coords(seg_coords)
+            apply_affine(M, xac, yac, zac, out=tuple(o.reshape(self.algo.shape()) for o in out))
+            return
 
-        xac, yac, zac = None, None, None
+        self._check_children_indexes()
+        i0 = 0
+        for child in self.list_of_children:
+            i1 = i0 + child.get_size_geo_array()
+            child._fill_pixel_coords(tuple(o[i0:i1] for o in out), compose_affine(M, child.transform_matrix(do_tilt)),\
+                                     do_tilt, seg_coords)
+            i0 = i1
+        for o in out: self._shuffle_in_place(o)
 
-        for ind, child in enumerate(self.list_of_children):
-            if child.oindex != ind:
-                logger.warning('Geometry object %s:%d has non-consequtive index in calibration file, reconst index:%d' % \
-                      (child.oname, child.oindex, ind))
 
-            xch, ych, zch = child.get_pixel_coords(do_tilt)
-
-            if ind==0:
-                xac = xch
-                yac = ych
-                zac = zch
-            else:
-                xac = np.vstack((xac, xch))
-                yac = np.vstack((yac, ych))
-                zac = np.vstack((zac, zch))
-
-        # define shape for output x,y,z arrays
-        #shape_child = xch.shape
-        len_child = len(self.list_of_children)
-        geo_shape = np.hstack(([len_child], xch.shape))
-        #logger.debug('geo_shape = ' + str(geo_shape))
-        xac.shape = geo_shape
-        yac.shape = geo_shape
-        zac.shape = geo_shape
-        X, Y, Z = self.transform_geo_coord_arrays(xac, yac, zac, do_tilt)
-        return self.det_shape(X), self.det_shape(Y), self.det_shape(Z)
+    def _collect_pixel_coord_tasks(self, out, M, do_tilt, tasks, shuffles):
+        """ Appends to the list tasks (segment, out slices, M) for all segments of self in the order of _fill_pixel_coords,
+            and to the list shuffles (object, out slices) for objects which shuffle pixels after their children are filled.
+        """
+        if self.algo is not None:
+            tasks.append((self, out, M))
+            return
 
+        self._check_children_indexes()
+        i0 = 0
+        for child in self.list_of_children:
+            i1 = i0 + child.get_size_geo_array()
+            child._collect_pixel_coord_tasks(tuple(o[i0:i1] for o in out), compose_affine(M, child.transform_matrix(do_tilt)),\
+                                             do_tilt, tasks, shuffles)
+            i0 = i1
+        if self.is_cspad2x2(out[0].size): shuffles.append((self, out))
 
-    def get_pixel_areas(self):
-        """ Returns numpy array with pixel areas for self geometry object.
+
+    def _fill_geo_array(self, out, getter):
+        """ Fills flat preallocated array out of self size with per-pixel arrays returned by getter(seg_geometry) for segments.
         """
         if self.algo is not None:
-            return self.algo.pixel_area_array()
+            out[:] = getter(self.algo).ravel()
+            return
+
+        self._check_children_indexes()
+        i0 = 0
+        for child in self.list_of_children:
+            i1 = i0 + child.get_size_geo_array()
+            child._fill_geo_array(out[i0:i1], getter)
+            i0 = i1
+        self._shuffle_in_place(out)
+
 
-        aar = None
+    def _get_geo_array(self, getter):
+        """ Returns per-pixel array of self shape assembled in one preallocated buffer from segment arrays getter(seg_geometry).
+        """
+        if self.algo is not None: return getter(self.algo)
+        seg = self.get_list_of_segments()[0]
+        out = np.empty(self.get_size_geo_array(), dtype=getter(seg.algo).dtype)
+        self._fill_geo_array(out, getter)
+        return out.reshape(self.get_shape_geo_array())
+
+
+    def _check_children_indexes(self):
         for ind, child in enumerate(self.list_of_children):
             if child.oindex != ind:
                 logger.warning('Geometry object %s:%d has non-consequtive index in calibration file, reconst index:%d' % \
                       (child.oname, child.oindex, ind))
 
-            ach = child.get_pixel_areas()
-            aar = ach if ind==0 else np.vstack((aar, ach))
 
-        # define shape for output x,y,z arrays
-        shape_child = ach.shape
-        len_child = len(self.list_of_children)
-        geo_shape = np.hstack(([len_child], ach.shape))
-        #logger.debug('geo_shape = ' + str(geo_shape))
-        aar.shape = geo_shape
-        return self.det_shape(aar)
+    def get_pixel_areas(self):
+        """ Returns numpy array with pixel areas for self geometry object.
+        """
+        return self._get_geo_array(lambda sg: sg.pixel_area_array())
 
 
     def get_pixel_mask(self, mbits=0o377, **kwargs):
@@ -319,26 +451,7 @@ class GeometryObject(object):
                +8 - nearest four neighbours of non-bonded pixels
                +16- eight neighbours of non-bonded pixels
         """
-
-        if self.algo is not None:
-            return self.algo.pixel_mask_array(mbits=mbits, **kwargs)
-
-        oar = None
-        for ind, child in enumerate(self.list_of_children):
-            if child.oindex != ind:
-                logger.warning('Geometry object %s:%d has non-consequtive index in calibration file, reconst index:%d' % \
-                      (child.oname, child.oindex, ind))
-
-            car = child.get_pixel_mask(mbits=mbits, **kwargs)
-            oar = car if ind==0 else np.vstack((oar, car))
-
-        # define shape for output x,y,z arrays
-        shape_child = car.shape
-        len_child = len(self.list_of_children)
-        geo_shape = np.hstack(([len_child], car.shape))
-        #logger.debug('geo_shape = ' + str(geo_shape))
-        oar.shape = geo_shape
-        return self.det_shape(oar)
+        return self._get_geo_array(lambda sg: sg.pixel_mask_array(mbits=mbits, **kwargs))
 
 
     def get_size_geo_array(self):
@@ -353,6 +466,60 @@ class GeometryObject(object):
         return size_arr
 
 
+    def get_shape_geo_array(self):
+        """ Returns shape of per-pixel arrays for self geometry object, e.g. (<number-of-children>, <child-shape>).
+        """
+        if self.algo is not None: return self.algo.shape()
+
+        size = self.get_size_geo_array()
+        if self.is_cspad2x2(size): return (185,388,2)
+        shape = (len(self.list_of_children),) + tuple(self.list_of_children[-1].get_shape_geo_array())
+        return shape if int(np.prod(shape)) == size else (size,)
+
+
+    def get_list_of_segments(self):
+        """ Returns list of segment (bottom level) geometry objects in the order of their pixel arrays.
+        """
+        if self.algo is not None: return [self]
+        return [seg for child in self.list_of_children for seg in child.get_list_of_segments()]
+
+
+    def get_path_from(self, ancestor):
+        """ Returns list of geometry objects [ancestor, ..., self], or None if ancestor is not found in parents of self.
+        """
+        path = [self]
+        while path[-1] is not ancestor:
+            parent = path[-1].get_parent()
+            if parent is None: return None
+            path.append(parent)
+        return path[::-1]
+
+
+    def update_pixel_coords(self, out, child, do_tilt=True, mtx=None):
+        """ Recomputes only the slice of descendant object child in flat arrays out=(X, Y, Z)
+            of self pixel coordinates, evaluated earlier by get_pixel_coords with the same do_tilt and mtx.
+            Returns False and does not change out if child is not a descendant of self,
+            or if its pixels are shuffled by CSPAD2X2 object on the path.
+        """
+        path = child.get_path_from(self)
+        if path is None or len(path) < 2: return False
+
+        M = self.transform_matrix(do_tilt)
+        if mtx is not None: M = compose_affine(mtx, M)
+
+        i0 = 0
+        for parent, obj in zip(path[:-1], path[1:]):
+            if parent.is_cspad2x2(parent.get_size_geo_array()): return False
+            for sibling in parent.list_of_children:
+                if sibling is obj: break
+                i0 += sibling.get_size_geo_array()
+            M = compose_affine(M, obj.transform_matrix(do_tilt))
+
+        i1 = i0 + child.get_size_geo_array()
+        child._fill_pixel_coords(tuple(o[i0:i1] for o in out), M, do_tilt)
+        return True
+
+
     def get_pixel_scale_size(self):
         """ Returns pixel scale size of the geometry object from the first found segment.
         """
@@ -392,34 +559,72 @@ class GeometryObject(object):
         return Xt, Yt
 
 
-    def get_2d_pixel_coords(self, do_tilt=True):
+    def transform_matrix_2d(self, do_tilt=True):
+        """ Returns 2x3 affine matrix of transformation from self to the parent frame,
+            equivalent to transform_2d_geo_coord_arrays.
+        """
+        angle_z = self.rot_z + self.tilt_z if do_tilt else self.rot_z
+        a = radians(angle_z)
+        S, C = sin(a), cos(a)
+        return affine_matrix(((C, -S), (S, C)), (self.x0, self.y0))
+
+
+    def get_2d_pixel_coords(self, do_tilt=True, mtx=None, shaped=False):
         """ Simplified version of get_pixel_coords() for 2-d case.
+            mtx - 2x3 affine matrix from the parent frame to the output frame, None - output in the parent frame.
+            shaped - if True arrays have shape of get_shape_geo_array(), otherwise as before: segment shape for segment,
+                     (185,388,2) for CSPAD2X2:V1, flat arrays for other composite objects.
+        """
+        M = self.transform_matrix_2d(do_tilt)
+        if mtx is not None: M = compose_affine(mtx, M)
+
+        size = self.get_size_geo_array()
+        out = (np.empty(size), np.empty(size))
+        self._fill_2d_pixel_coords(out, M, do_tilt)
+        if not shaped and self.algo is None and not self.is_cspad2x2(size): return out
+        shape = self.get_shape_geo_array()
+        return tuple(o.reshape(shape) for o in out)
+
+
+    def _fill_2d_pixel_coords(self, out, M, do_tilt=True):
+        """ 2-d version of _fill_pixel_coords for out=(X, Y) and 2x3 affine matrix M.
         """
-        #if self.oname == 'SENS2X1:V1':
         if self.algo is not None:
-            #xac, yac, zac = self.algo.get_xyz_maps_um()
-            xac, yac, zac = self.algo.pixel_coord_array()
-            return self.transform_2d_geo_coord_arrays(xac, yac, do_tilt)
+            xac, yac, zac = self.algo.pixel_coord_axes()
+            apply_affine_2d(M, xac, yac, out=tuple(o.reshape(self.algo.shape()) for o in out))
+            return
 
-        xac, yac = [], []
+        i0 = 0
         for child in self.list_of_children:
-            xch, ych = child.get_2d_pixel_coords(do_tilt)
-            xac += list(xch.flatten())
-            yac += list(ych.flatten())
-        X, Y = self.transform_2d_geo_coord_arrays(np.array(xac), np.array(yac), do_tilt)
-        return self.det_shape(X), self.det_shape(Y)
+            i1 = i0 + child.get_size_geo_array()
+            child._fill_2d_pixel_coords(tuple(o[i0:i1] for o in out), compose_affine(M, child.transform_matrix_2d(do_tilt)), do_tilt)
+            i0 = i1
+        for o in out: self._shuffle_in_place(o)
+
+
+    def is_cspad2x2(self, size):
+        """ Returns True if pixel arrays of self object need to be shuffled to CSPAD2X2 data shape.
+        """
+        return size == 143560 and self.oname == 'CSPAD2X2:V1'
 
 
     def det_shape(self, arr):
         """ Check detector dependency and re-shape array if necessary.
         """
         #logger.debug('PSCalib.GeometryObject.det_shape(...):  arr.size: %d   self.oname: %s' % (arr.size, self.oname))
-        if arr.size == 143560 and self.oname == 'CSPAD2X2:V1': # Shuffle pixels once for 2*185*388 and CSPAD2X2:V1 ONLY:
+        if self.is_cspad2x2(arr.size): # Shuffle pixels once for 2*185*388 and CSPAD2X2:V1 ONLY:
             # shaffle array for cspad2x2
             return two2x1ToData2x2(arr)
         return arr
 
 
+    def _shuffle_in_place(self, arr):
+        """ Shuffles flat array arr in place if det_shape requires.
+        """
+        if self.is_cspad2x2(arr.size):
+            arr[:] = two2x1ToData2x2(arr.reshape((2,185,388))).ravel()
+
+
 #------ Global Method(s) ------
 
 def data2x2ToTwo2x1(arr2x2):
@@ -447,10 +652,8 @@ def two2x1ToData2x2(arrTwo2x1):
         raise ValueError('Expected n-d array shape=(2,185,388), input shape=%s' % str(arrTwo2x1.shape))
 
     arrTwo2x1.shape = (2,185,388)
-    #arr2x2 = np.array(zip(arrTwo2x1[0].flatten(), arrTwo2x1[1].flatten()))
-    arr2x2 = np.array(list(zip(arrTwo2x1[0].flatten(), arrTwo2x1[1].flatten())))
-    arr2x2.shape = (185,388,2)
-    return arr2x2
+    #arr2x2 = np.array(list(zip(arrTwo2x1[0].flatten(), arrTwo2x1[1].flatten())))
+    return np.array(arrTwo2x1.transpose(1,2,0))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+
+"""
+Class :py:class:`GeometryPlan` - immutable compiled geometry arrays for concurrent use
+=====================================================================================
+
+All per-pixel arrays for a chosen set of options are evaluated once by :py:class:`GeometryAccess`
+and kept as read-only views of its cached arrays, without copying. The plan object does not change
+after construction and keeps no per-call buffers, so it can be shared by threads without locks.
+Later changes of geometry (move_geo, tilt_geo, etc.) do not affect the compiled plan,
+because cached arrays are replaced, not modified in place.
+
+Usage::
+
+    from PSCalib.GeometryAccess import GeometryAccess
+    from PSCalib.GeometryPlan import GeometryPlan
+
+    geometry = GeometryAccess(fname_geometry)
+    plan = geometry.compile(oname=None, oindex=0, do_tilt=True, cframe=0,\
+                            pix_scale_size_um=None, xy0_off_pix=None, mbits=0o377)
+    # or
+    plan = GeometryPlan(geometry, oname=None, oindex=0, do_tilt=True, cframe=0,\
+                        pix_scale_size_um=None, xy0_off_pix=None, mbits=0o377)
+
+    X, Y, Z    = plan.xyz      # read-only pixel coordinate arrays [um]
+    rows, cols = plan.rc       # read-only image row and column index arrays
+    area       = plan.area     # read-only pixel area array
+    mask       = plan.mask     # read-only pixel mask array for mbits
+    inds       = plan.inds     # read-only flat image indexes of pixels
+    shape      = plan.shape    # image shape (rows, cols)
+    pixsize    = plan.pixel_scale_size
+    opts       = plan.options  # read-only mapping of compilation options
+
+    img = plan.image(nda, dtype=np.float32, vbase=0) # new image array for each call
+    img = plan.image(nda, out=img)                   # or fill caller-owned image of shape plan.shape
+    nda = plan.data_from_image(img)
+
+See:
+ * :py:class:`GeometryAccess`
+ * :py:class:`ImageAssembler`
+
+This software was developed for the SIT project.
+If you use all or part of it, please give an appropriate acknowledgment.
+
+Created: 2026-10-16
+"""
+from __future__ import print_function
+from __future__ import division
+
+import logging
+logger = logging.getLogger(__name__)
+
+import numpy as np
+from types import MappingProxyType
+
+
+class GeometryPlan(object):
+    """Immutable set of read-only per-pixel geometry arrays compiled for fixed options.
+
+    Parameters
+
+    - geo : :py:class:`GeometryAccess` - geometry object
+    - oname, oindex, do_tilt, cframe, pix_scale_size_um, xy0_off_pix - the same as in
+      :py:meth:`GeometryAccess.get_pixel_coord_indexes`
+    - mbits : int - mask control bitword for :py:meth:`GeometryAccess.get_pixel_mask`
+    """
+
+    def __init__(self, geo, oname=None, oindex=0, do_tilt=True, cframe=0,\
+                 pix_scale_size_um=None, xy0_off_pix=None, mbits=0o377):
+        if not geo.is_valid():
+            raise ValueError('GeometryPlan: geometry is not valid')
+
+        from PSCalib.GeometryAccess import read_only_view # module imports GeometryPlan
+
+        set_ = object.__setattr__
+        set_(self, 'options', MappingProxyType(dict(oname=oname, oindex=oindex, do_tilt=do_tilt, cframe=cframe,\
+                                                    pix_scale_size_um=pix_scale_size_um,\
+                                                    xy0_off_pix=None if xy0_off_pix is None else tuple(xy0_off_pix),\
+                                                    mbits=mbits)))
+        set_(self, 'xyz', read_only_view(geo.get_pixel_coords(oname, oindex, do_tilt, cframe)))
+        rows, cols = geo.get_pixel_coord_indexes(oname, oindex, pix_scale_size_um, xy0_off_pix, do_tilt, cframe)
+        set_(self, 'rc', (read_only_view(rows), read_only_view(cols)))
+        set_(self, 'area', read_only_view(geo.get_pixel_areas(oname, oindex)))
+        set_(self, 'mask', read_only_view(geo.get_pixel_mask(oname, oindex, mbits)))
+        set_(self, 'pixel_scale_size', geo.get_pixel_scale_size(oname, oindex))
+        set_(self, 'data_shape', rows.shape)
+        set_(self, 'npixels', rows.size)
+
+        inds, shape = geo.get_pixel_flat_indexes(oname, oindex, pix_scale_size_um, xy0_off_pix, do_tilt, cframe)
+        set_(self, 'shape', shape)
+        set_(self, 'inds', read_only_view(inds.ravel()))
+
+
+    def __setattr__(self, name, value):
+        raise AttributeError('GeometryPlan is immutable, attribute %s can not be set' % name)
+
+
+    def __delattr__(self, name):
+        raise AttributeError('GeometryPlan is immutable, attribute %s can not be deleted' % name)
+
+
+    def image(self, nda, out=None, dtype=np.float32, vbase=0):
+        """Returns 2-d image for data array nda in new array, or in caller-supplied c-contiguous array out of self shape.
+        """
+        if nda.size != self.npixels:
+            raise ValueError('GeometryPlan: data size %d is different from number of pixels in geometry %d'%\
+                             (nda.size, self.npixels))
+        if out is None:
+            out = np.empty(self.shape, dtype=dtype)
+        elif out.shape != self.shape or not out.flags.c_contiguous:
+            raise ValueError('GeometryPlan: out array should be c-contiguous with shape %s' % str(self.shape))
+        out.fill(vbase)
+        out.reshape(-1)[self.inds] = nda.ravel()
+        return out
+
+
+    def data_from_image(self, img, dtype=None):
+        """Returns data array of geometry data shape gathered from 2-d image pixels.
+        """
+        if img.shape != self.shape:
+            raise ValueError('GeometryPlan: image shape %s is different from geometry image shape %s'%\
+                             (str(img.shape), str(self.shape)))
+        nda = np.take(img.reshape(-1), self.inds).reshape(self.data_shape)
+        return nda if dtype is None else nda.astype(dtype, copy=False)
+
+
+if __name__ == "__main__":
+    import sys
+    from time import time
+    from threading import Thread
+    logging.basicConfig(format='[%(levelname).1s] L%(lineno)04d: %(message)s', level=logging.INFO)
+    from PSCalib.GeometryAccess import GeometryAccess
+
+    fname_geometry = sys.argv[1] if len(sys.argv) > 1 else 'geometry.txt'
+    geometry = GeometryAccess(fname_geometry)
+    t0_sec = time()
+    plan = geometry.compile()
+    logger.info('GeometryPlan compilation time %.3f sec, image shape: %s' % (time()-t0_sec, str(plan.shape)))
+
+    def run(i):
+        img = plan.image(np.full(plan.data_shape, i, dtype=np.float32))
+        logger.info('thread %d image sum: %.1f' % (i, img.sum()))
+
+    threads = [Thread(target=run, args=(i,)) for i in range(4)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    sys.exit('END OF TEST')
+
+# EOF
@@ -0,0 +1,257 @@
+#!/usr/bin/env python
+
+"""
+Class :py:class:`ImageAssembler` - precompiled per-event image reconstruction from detector data
+================================================================================================
+
+Flat destination indexes of detector pixels in the image are evaluated once from
+:py:meth:`GeometryAccess.get_pixel_coord_indexes` and used for each event.
+
+Usage::
+
+    from PSCalib.GeometryAccess import GeometryAccess
+    from PSCalib.ImageAssembler import ImageAssembler
+
+    geometry = GeometryAccess(fname_geometry)
+    ia = ImageAssembler(geometry, pix_scale_size_um=None, xy0_off_pix=None, do_tilt=True, cframe=0, dtype=np.float32, vbase=0)
+    # or from index arrays:
+    ia = ImageAssembler(rows=rows, cols=cols)
+
+    # fill internally reused image buffer - it is overwritten on next call
+    img = ia.image(nda)
+
+    # fill caller-supplied image of shape ia.shape
+    img = ia.image(nda, out=img)
+
+    # new image array for each call
+    img = ia.image(nda, copy=True)
+
+    # batch of N events ndas.shape=(N,<data-shape>) -> image stack of shape (N,rows,cols),
+    # internal buffer is reused for the same or smaller N
+    imgs = ia.images(ndas)
+    imgs = ia.images(ndas, out=imgs)
+
+    # accumulate mode - intensities of detector pixels mapped to the same image pixel are summed,
+    # counts is the (rows,cols) hit-count map of detector pixels per image pixel
+    img, counts = ia.image_accumulated(nda)
+    # the same, normalized by counts
+    img, counts = ia.image_accumulated(nda, normalize=True)
+    counts = ia.counts()
+
+    # inverse assembly: image (or image stack) -> data array of geometry shape, e.g. for mask drawn on image
+    mask_nda = ia.data_from_image(mask2d, dtype=np.uint8)
+    ndas = ia.data_from_image(imgs)
+
+    shape = ia.shape     # image shape (rows, cols)
+    inds  = ia.inds      # flat int32 (or int64 for large images) image indexes of detector pixels
+    npix  = ia.npixels   # number of detector pixels
+
+See:
+ * :py:class:`GeometryAccess`
+
+This software was developed for the SIT project.
+If you use all or part of it, please give an appropriate acknowledgment.
+
+Created: 2026-10-16
+"""
+from __future__ import print_function
+from __future__ import division
+
+import logging
+logger = logging.getLogger(__name__)
+
+import numpy as np
+
+
+def flat_index_dtype(size):
+    """Returns np.int32 or np.int64 dtype for flat indexes of array of specified size.
+    """
+    return np.int32 if size < 2**31 else np.int64
+
+
+class ImageAssembler(object):
+    """Assembles 2-d images from detector data using precomputed flat image indexes.
+
+    Parameters
+
+    - geo : :py:class:`GeometryAccess` - geometry object, or None if rows and cols are specified
+    - rows, cols : np.array - image row and column index arrays of data shape, used if geo is None
+    - dtype : np.dtype - image data type
+    - vbase : float - value of image pixels not covered by detector pixels
+    - other keyword arguments oname, oindex, pix_scale_size_um, xy0_off_pix, do_tilt, cframe
+      are passed to :py:meth:`GeometryAccess.get_pixel_coord_indexes`
+    """
+
+    def __init__(self, geo=None, rows=None, cols=None, dtype=np.float32, vbase=0, **kwa):
+        self.dtype = dtype
+        self.vbase = vbase
+        self.img = None
+        self.imgs = None
+        self._counts = None
+
+        if geo is not None:
+            inds, shape = geo.get_pixel_flat_indexes(**kwa)
+            if inds is None:
+                raise ValueError('ImageAssembler needs in valid geometry or rows and cols index arrays')
+            self.set_flat_indexes(inds, shape)
+            return
+
+        if rows is None or cols is None:
+            raise ValueError('ImageAssembler needs in valid geometry or rows and cols index arrays')
+
+        if rows.size != cols.size:
+            raise ValueError('ImageAssembler: input array sizes are different rows.size=%d, cols.size=%d' % (rows.size, cols.size))
+
+        self.set_indexes(rows, cols)
+
+
+    def set_indexes(self, rows, cols):
+        """Evaluates flat image indexes and image shape from rows and cols index arrays.
+        """
+        rowsfl = rows.ravel()
+        colsfl = cols.ravel()
+        shape = (int(rowsfl.max())+1, int(colsfl.max())+1)
+        dtype = flat_index_dtype(shape[0]*shape[1])
+        inds = rows.astype(dtype) * dtype(shape[1]) + cols.astype(dtype)
+        self.set_flat_indexes(inds, shape)
+
+
+    def set_flat_indexes(self, inds, shape):
+        """Sets flat image indexes inds of data shape and image shape.
+        """
+        self.data_shape = inds.shape
+        self.npixels = inds.size
+        self.shape = tuple(shape)
+        self.inds = inds.ravel()
+        size = self.shape[0]*self.shape[1]
+
+        # indexes of image pixels which are not covered by detector pixels
+        covered = np.zeros(size, dtype=bool)
+        covered[self.inds] = True
+        self.inds_empty = np.flatnonzero(~covered).astype(flat_index_dtype(size))
+
+
+    def _check_data(self, nda):
+        if nda.size != self.npixels:
+            raise ValueError('ImageAssembler: data size %d is different from number of pixels in geometry %d'%\
+                             (nda.size, self.npixels))
+
+
+    def empty_image(self, dtype=None):
+        """Returns new image array of self shape with all pixels set to vbase.
+        """
+        img = np.empty(self.shape, dtype=self.dtype if dtype is None else dtype)
+        img.fill(self.vbase)
+        return img
+
+
+    def image(self, nda, out=None, copy=False):
+        """Returns 2-d image for data array nda.
+
+           out  - caller-supplied image array of self shape to fill.
+           copy - if False and out is None, the image buffer is reused and overwritten on the next call.
+        """
+        self._check_data(nda)
+        if out is not None:
+            if out.shape != self.shape or not out.flags.c_contiguous:
+                raise ValueError('ImageAssembler: out array should be c-contiguous with shape %s' % str(self.shape))
+            out.reshape(-1)[self.inds_empty] = self.vbase
+            img = out
+        elif copy:
+            img = self.empty_image()
+        else:
+            if self.img is None: self.img = self.empty_image()
+            img = self.img
+
+        img.reshape(-1)[self.inds] = nda.ravel()
+        return img
+
+
+    def counts(self):
+        """Returns read-only (rows,cols) array of numbers of detector pixels mapped to each image pixel.
+        """
+        if self._counts is None:
+            size = self.shape[0]*self.shape[1]
+            self._counts = np.bincount(self.inds, minlength=size).astype(np.uint32).reshape(self.shape)
+            self._counts.setflags(write=False)
+        return self._counts
+
+
+    def image_accumulated(self, nda, normalize=False):
+        """Returns image with summed intensities of all detector pixels mapped to the same image pixel
+           and the read-only hit-count map of shape (rows,cols).
+
+           normalize - if True, image pixels are divided by their non-zero counts.
+        """
+        self._check_data(nda)
+        size = self.shape[0]*self.shape[1]
+        img = np.bincount(self.inds, weights=nda.ravel(), minlength=size).reshape(self.shape)
+        counts = self.counts()
+        if normalize:
+            np.divide(img, counts, out=img, where=counts>0)
+        img = img.astype(self.dtype)
+        img.reshape(-1)[self.inds_empty] = self.vbase
+        return img, counts
+
+
+    def data_from_image(self, img, dtype=None):
+        """Inverse of image assembly - returns data array of geometry data shape gathered from image pixels.
+           For image stack of shape (N,rows,cols) returns array of shape (N,<data-shape>).
+        """
+        if img.shape[-2:] != self.shape:
+            raise ValueError('ImageAssembler: image shape %s is different from geometry image shape %s'%\
+                             (str(img.shape), str(self.shape)))
+        if img.ndim == 2:
+            nda = np.take(img.reshape(-1), self.inds).reshape(self.data_shape)
+        else:
+            nevts = img.size // (self.shape[0]*self.shape[1])
+            nda = np.take(img.reshape(nevts,-1), self.inds, axis=1).reshape((nevts,) + self.data_shape)
+        return nda if dtype is None else nda.astype(dtype, copy=False)
+
+
+    def images(self, ndas, out=None, copy=False):
+        """Returns stack of images of shape (N,rows,cols) for stack of N data arrays ndas of shape (N,<data-shape>).
+
+           out  - caller-supplied c-contiguous array of shape (N,rows,cols) to fill.
+           copy - if False and out is None, the image stack buffer is reused and overwritten on the next call.
+        """
+        if ndas.size % self.npixels:
+            raise ValueError('ImageAssembler: data stack size %d is not multiple of number of pixels in geometry %d'%\
+                             (ndas.size, self.npixels))
+        nevts = ndas.size // self.npixels
+        shape = (nevts,) + self.shape
+
+        if out is not None:
+            if out.shape != shape or not out.flags.c_contiguous:
+                raise ValueError('ImageAssembler: out array should be c-contiguous with shape %s' % str(shape))
+            imgs = out
+            imgs.reshape(nevts,-1)[:,self.inds_empty] = self.vbase
+        elif copy or self.imgs is None or self.imgs.shape[0] < nevts:
+            imgs = np.empty(shape, dtype=self.dtype)
+            imgs.fill(self.vbase)
+            if not copy: self.imgs = imgs
+        else:
+            imgs = self.imgs[:nevts]
+
+        imgs.reshape(nevts,-1)[:,self.inds] = ndas.reshape(nevts,-1)
+        return imgs
+
+
+if __name__ == "__main__":
+    import sys
+    from time import time
+    logging.basicConfig(format='[%(levelname).1s] L%(lineno)04d: %(message)s', level=logging.DEBUG)
+    from PSCalib.GeometryAccess import GeometryAccess
+
+    fname_geometry = sys.argv[1] if len(sys.argv) > 1 else 'geometry.txt'
+    geometry = GeometryAccess(fname_geometry)
+    t0_sec = time()
+    ia = ImageAssembler(geometry)
+    logger.info('ImageAssembler initialization time %.6f sec' % (time()-t0_sec))
+    nda = np.random.random(ia.data_shape).astype(np.float32)
+    t0_sec = time()
+    img = ia.image(nda)
+    logger.info('image shape %s assembly time %.6f sec' % (str(img.shape), time()-t0_sec))
+    sys.exit('END OF TEST')
+
+# EOF
@@ -0,0 +1,215 @@
+#!/usr/bin/env python
+
+"""
+Class :py:class:`PixelLocator` - vectorized inverse mapping of coordinates to detector pixels
+=============================================================================================
+
+For each segment the inverse of the composed 2-d affine transformation from the segment frame
+to the frame of the selected geometry object is precomputed once, together with the pixel bounds
+along segment rows and columns (wide pixels and gaps between ASICs included).
+Arrays of (x, y) points are mapped to (segment, row, col, fractional offsets) in one call.
+Points are projected on segment planes along the Z axis, like in image reconstruction from X, Y coordinates.
+
+Usage::
+
+    from PSCalib.GeometryAccess import GeometryAccess
+    from PSCalib.PixelLocator import PixelLocator
+
+    geometry = GeometryAccess(fname_geometry)
+    loc = PixelLocator(geometry, oname=None, oindex=0, do_tilt=True, cframe=0)
+
+    # x, y - arrays of coordinates [um] in the frame of get_pixel_coords with the same parameters
+    seg, row, col, drow, dcol = loc.locate(x, y)
+    # seg  - index of segment in the list of segments, -1 for points outside of all segments
+    # row, col - pixel indexes in the segment, drow, dcol - fractional offsets from geometrical pixel center
+    #        in the range [-0.5, 0.5] in units of pixel size along increasing row and col indexes
+
+    # image coordinates rows, cols [pixel] of image from get_pixel_coord_indexes with the same parameters,
+    # integer values correspond to image pixel centers
+    seg, row, col, drow, dcol = loc.locate_image(rows, cols, pix_scale_size_um=None, xy0_off_pix=None)
+
+    # flat indexes of located pixels in the data array of geometry shape, -1 for points outside
+    inds = loc.flat_index(seg, row, col)
+
+    segs = loc.segments # list of segment GeometryObject-s
+
+See:
+ * :py:class:`GeometryAccess`
+ * :py:class:`GeometryObject`
+
+This software was developed for the SIT project.
+If you use all or part of it, please give an appropriate acknowledgment.
+
+Created: 2026-10-16
+"""
+from __future__ import print_function
+from __future__ import division
+
+import logging
+logger = logging.getLogger(__name__)
+
+import numpy as np
+from PSCalib.GeometryObject import compose_affine
+from PSCalib.SegGeometryStore import sgs
+from PSCalib.GeometryAccess import MTX_PSANA_TO_LAB
+
+
+def axis_bounds(coords, sizes):
+    """Returns (lo, hi, reversed) for geometrical pixel center coordinates and sizes along one segment axis,
+       lo, hi - ascending arrays of pixel low and high bounds, gaps between pixels are allowed,
+       reversed=True if coordinates decrease with pixel index.
+    """
+    rev = coords[-1] < coords[0]
+    c, s = (coords[::-1], sizes[::-1]) if rev else (coords, sizes)
+    return c - s/2, c + s/2, rev
+
+
+def segment_axes(segname):
+    """Returns for rows and columns of segment segname tuples (iuv, lo, hi, reversed),
+       where iuv=0/1 if the axis is along the segment frame x/y.
+    """
+    sg = sgs.Create(segname=segname, pbits=0, use_wide_pix_center=True) # geometrical centers of wide pixels
+    X, Y, Z = sg.pixel_coord_array()
+    SX, SY, SZ = sg.pixel_size_array()
+    axes = []
+    for sl in ((slice(None), 0), (0, slice(None))): # along rows, along columns
+        along_x = np.ptp(X[sl]) >= np.ptp(Y[sl])
+        coords, sizes = (X[sl], SX[sl]) if along_x else (Y[sl], SY[sl])
+        axes.append((0 if along_x else 1,) + axis_bounds(np.array(coords, dtype=np.float64), sizes))
+    return axes
+
+
+def inverse_affine_2d(M):
+    """Returns 2x3 affine matrix of inverse transformation for x, y of the segment plane z=0 from 3x4 matrix M.
+    """
+    A = M[:2,:2]
+    Ainv = np.linalg.inv(A)
+    return np.hstack((Ainv, -np.dot(Ainv, M[:2,3]).reshape(2,1)))
+
+
+class PixelLocator(object):
+    """Maps arrays of coordinates to segment pixel indexes using precomputed per-segment inverse affine matrices.
+
+    Parameters
+
+    - geo : :py:class:`GeometryAccess` - geometry object
+    - oname, oindex, do_tilt, cframe - the same as in :py:meth:`GeometryAccess.get_pixel_coords`
+    """
+
+    def __init__(self, geo, oname=None, oindex=0, do_tilt=True, cframe=0):
+        self.geo = geo
+        self.oname, self.oindex, self.do_tilt, self.cframe = oname, oindex, do_tilt, cframe
+
+        top = geo.get_top_geo() if oname is None else geo.get_geo(oname, oindex)
+        if top is None:
+            raise ValueError('PixelLocator: geometry object %s:%d is not found' % (oname, oindex))
+
+        mtx = compose_affine(MTX_PSANA_TO_LAB, top.transform_matrix(do_tilt)) if cframe>0 else\
+              top.transform_matrix(do_tilt)
+
+        self.segments = top.get_list_of_segments()
+        self.minvs = []
+        self.axes = []
+        self.offsets = []
+        self.cspad2x2 = [] # (offset, nsegs, iseg) of segments shuffled in CSPAD2X2 data, or None
+        offset = 0
+        cache_axes = {}
+        for seg in self.segments:
+            path = seg.get_path_from(top)
+            M = mtx
+            for obj in path[1:]: M = compose_affine(M, obj.transform_matrix(do_tilt))
+            self.minvs.append(inverse_affine_2d(M))
+
+            sg = seg.algo
+            if seg.oname not in cache_axes: cache_axes[seg.oname] = segment_axes(seg.oname)
+            self.axes.append(cache_axes[seg.oname])
+
+            parent = seg.get_parent()
+            if parent is not None and parent.is_cspad2x2(parent.get_size_geo_array()):
+                iseg = parent.get_list_of_children().index(seg)
+                self.cspad2x2.append((offset - iseg*sg.size(), len(parent.get_list_of_children()), iseg))
+            else:
+                self.cspad2x2.append(None)
+            self.offsets.append(offset)
+            offset += sg.size()
+
+
+    def locate(self, x, y):
+        """Returns arrays seg, row, col, drow, dcol for arrays of point coordinates x, y [um].
+           seg=-1 for points outside of all segments, then row, col, drow, dcol are undefined.
+        """
+        x = np.asarray(x, dtype=np.float64).ravel()
+        y = np.asarray(y, dtype=np.float64).ravel()
+        seg = np.full(x.size, -1, dtype=np.int32)
+        rc  = np.zeros((2, x.size), dtype=np.int32)
+        drc = np.zeros((2, x.size), dtype=np.float64)
+
+        for i, (Minv, axes) in enumerate(zip(self.minvs, self.axes)):
+            uv = (Minv[0,0]*x + Minv[0,1]*y + Minv[0,2],\
+                  Minv[1,0]*x + Minv[1,1]*y + Minv[1,2])
+            inds, fracs = [], []
+            inside = seg < 0
+            for iuv, lo, hi, rev in axes:
+                a = uv[iuv]
+                k = np.clip(np.searchsorted(lo, a, side='right') - 1, 0, lo.size-1)
+                inside &= (a >= lo[k]) & (a < hi[k])
+                f = (a - lo[k]) / (hi[k] - lo[k]) - 0.5
+                inds.append(lo.size-1-k if rev else k)
+                fracs.append(-f if rev else f)
+            seg[inside] = i
+            for j in (0,1):
+                rc[j][inside] = inds[j][inside]
+                drc[j][inside] = fracs[j][inside]
+
+        return seg, rc[0], rc[1], drc[0], drc[1]
+
+
+    def locate_image(self, rows, cols, pix_scale_size_um=None, xy0_off_pix=None):
+        """Returns arrays seg, row, col, drow, dcol for arrays of image coordinates rows, cols [pixel]
+           of the image from :py:meth:`GeometryAccess.get_pixel_coord_indexes` with the same parameters.
+           Integer values of rows and cols correspond to image pixel centers.
+        """
+        X, Y, Z = self.geo.get_pixel_coords(self.oname, self.oindex, self.do_tilt, self.cframe)
+        # affine transformation (x,y) -> (row,col) evaluated at three points and inverted
+        r, c = self.geo.xy_to_rc_arrays(np.array((0.,1.,0.)), np.array((0.,0.,1.)), pix_scale_size_um, xy0_off_pix,\
+                                        self.cframe, xy_ref=(X, Y), fract=True)
+        A = np.array(((r[1]-r[0], r[2]-r[0]), (c[1]-c[0], c[2]-c[0])))
+        Ainv = np.linalg.inv(A)
+        dr = np.asarray(rows, dtype=np.float64).ravel() + 0.5 - r[0]
+        dc = np.asarray(cols, dtype=np.float64).ravel() + 0.5 - c[0]
+        return self.locate(Ainv[0,0]*dr + Ainv[0,1]*dc, Ainv[1,0]*dr + Ainv[1,1]*dc)
+
+
+    def flat_index(self, seg, row, col):
+        """Returns flat indexes of pixels in the data array of geometry shape, -1 for seg=-1.
+        """
+        seg = np.asarray(seg)
+        inds = np.full(seg.shape, -1, dtype=np.int64)
+        for i, (sgeo, offset, cs) in enumerate(zip(self.segments, self.offsets, self.cspad2x2)):
+            sel = seg == i
+            if not sel.any(): continue
+            local = np.asarray(row)[sel].astype(np.int64) * sgeo.algo.shape()[1] + np.asarray(col)[sel]
+            inds[sel] = offset + local if cs is None else cs[0] + local*cs[1] + cs[2]
+        return inds
+
+
+if __name__ == "__main__":
+    import sys
+    from time import time
+    logging.basicConfig(format='[%(levelname).1s] L%(lineno)04d: %(message)s', level=logging.INFO)
+    from PSCalib.GeometryAccess import GeometryAccess
+
+    fname_geometry = sys.argv[1] if len(sys.argv) > 1 else 'geometry.txt'
+    geometry = GeometryAccess(fname_geometry)
+    t0_sec = time()
+    loc = PixelLocator(geometry)
+    logger.info('PixelLocator initialization time %.6f sec' % (time()-t0_sec))
+    X, Y, Z = geometry.get_pixel_coords()
+    sel = np.random.randint(0, X.size, 10000)
+    t0_sec = time()
+    seg, row, col, drow, dcol = loc.locate(X.ravel()[sel], Y.ravel()[sel])
+    logger.info('locate time for %d points %.6f sec' % (sel.size, time()-t0_sec))
+    logger.info('fraction of points mapped to their own pixels: %.4f' % (loc.flat_index(seg, row, col) == sel).mean())
+    sys.exit('END OF TEST')
+
+# EOF
@@ -25,6 +25,7 @@ Usage::
     sizeX, sizeY, sizeZ = sg.pixel_size_array()
     X        = sg.pixel_coord_array('X')
     X,Y,Z    = sg.pixel_coord_array()
+    x,y,z    = sg.pixel_coord_axes() # separable coordinates of shapes broadcastable to sg.shape()
     xmin = sg.pixel_coord_min('X')
     ymax = sg.pixel_coord_max('Y')
     xmin, ymin, zmin = sg.pixel_coord_min()
@@ -58,6 +59,7 @@ from __future__ import print_function
 import logging
 logger = logging.getLogger(__name__)
 import numpy as np
+from threading import Lock
 
 
 def rotation(X, Y, C, S):
@@ -68,6 +70,21 @@ def rotation(X, Y, C, S):
     return Xrot, Yrot
 
 
+def meshgrid_views(x, y):
+    """For 1-d numpy arrays x and y returns read-only broadcast views X and Y of shape (y.size, x.size)
+       with the same content as np.meshgrid(x, y), 2-d arrays are not allocated.
+    """
+    shape = (y.size, x.size)
+    return np.broadcast_to(x.reshape(1,-1), shape), np.broadcast_to(y.reshape(-1,1), shape)
+
+
+def compact_view(a):
+    """Returns view of numpy array a reduced to length 1 along broadcast (zero-stride) axes,
+       e.g. of shape (1,cols) for view X from meshgrid_views.
+    """
+    return a[tuple(slice(None) if st else slice(0,1) for st in a.strides)]
+
+
 class SegGeometry(object):
 
     AXIS = ['X', 'Y', 'Z']
@@ -126,6 +143,12 @@ class SegGeometry(object):
         """
         self.print_warning('pixel_coord_array(axis)')
 
+    def pixel_coord_axes(self):
+        """ Returns x, y, z arrays of segment pixel coordinates in um broadcastable to the segment shape,
+            e.g. of shapes (1,cols), (rows,1), (1,1) for separable coordinates
+        """
+        return tuple(compact_view(a) for a in self.pixel_coord_array())
+
     def pixel_coord_min(self, axis):
         """ Returns minimal value in the array of segment pixel coordinates in um for AXIS
         """
@@ -141,6 +164,18 @@ class SegGeometry(object):
         """
         self.print_warning('pixel_mask_array(mask_bits)')
 
+    def cached_mask_array(self, make_mask, mbits, width=1, wcentral=1):
+        """ Returns read-only mask array make_mask(mbits, width, wcentral) evaluated once per (mbits, width, wcentral)
+        """
+        masks = self.__dict__.setdefault('_masks', {})
+        key = (mbits, width, wcentral)
+        mask = masks.get(key)
+        if mask is None:
+            mask = make_mask(mbits, width, wcentral)
+            mask.setflags(write=False)
+            masks[key] = mask
+        return mask
+
     def return_switch(self, meth, axis=None):
         """ Returns three x,y,z arrays if axis=None, or single array for specified axis
         """
@@ -155,6 +190,32 @@ class SegGeometry(object):
     def name(self): self.print_warning('name')
 
 
+_lock_singletons = Lock()
+
+def lazy_singletons(namespace, cls, singletons, base=None):
+    """Returns module-level __getattr__ (PEP 562, python 3.7 or later) which creates singleton objects of class cls
+       on first access to their names and keeps them in the module namespace,
+       singletons - dict {<name>: <dict of cls keyword arguments>},
+       base - module of the base class, its public names and lazy singletons are also accessible from the module.
+       Sets namespace __all__ to the public names of the module, singleton names, and public names of base,
+       so import * creates and exports singletons like module-level objects.
+    """
+    names = [n for n in namespace if not n.startswith('_')] + list(singletons)
+    if base is not None: names += [n for n in base.__all__ if n not in names]
+    namespace['__all__'] = names
+
+    def __getattr__(name):
+        kwa = singletons.get(name)
+        if kwa is None:
+            if base is not None: return getattr(base, name)
+            raise AttributeError('module %s has no attribute %s' % (namespace['__name__'], name))
+        with _lock_singletons:
+            if name not in namespace:
+                namespace[name] = cls(**kwa)
+        return namespace[name]
+    return __getattr__
+
+
 if __name__ == "__main__":
 
     import sys
@@ -137,8 +137,8 @@ class SegGeometryCspad2x1V1(SegGeometry):
         #sp.y_arr_pix = sp.y_arr_um/sp._pixs
 
         #sp.x_pix_arr_pix, sp.y_pix_arr_pix = np.meshgrid(sp.x_arr_pix, sp.y_arr_pix)
-        sp.x_pix_arr_um, sp.y_pix_arr_um  = np.meshgrid(sp.x_arr_um, sp.y_arr_um)
-        sp.z_pix_arr_um = np.zeros((sp._rows,sp._cols))
+        sp.x_pix_arr_um, sp.y_pix_arr_um  = meshgrid_views(sp.x_arr_um, sp.y_arr_um)
+        sp.z_pix_arr_um = np.broadcast_to(0., (sp._rows, sp._cols))
 
 
     def make_pixel_size_arrs(sp):
@@ -151,8 +151,8 @@ class SegGeometryCspad2x1V1(SegGeometry):
         x_arr_size_um = np.hstack([x_rhs_size_um[::-1],x_rhs_size_um])
         y_arr_size_um = np.ones(sp._rows) * sp._pixs
 
-        sp.x_pix_size_um, sp.y_pix_size_um = np.meshgrid(x_arr_size_um, y_arr_size_um)
-        sp.z_pix_size_um = np.ones((sp._rows,sp._cols)) * sp._pixd
+        sp.x_pix_size_um, sp.y_pix_size_um = meshgrid_views(x_arr_size_um, y_arr_size_um)
+        sp.z_pix_size_um = np.broadcast_to(float(sp._pixd), (sp._rows, sp._cols))
 
         factor = 1./(sp._pixs*sp._pixs)
         sp.pix_area_arr = sp.x_pix_size_um * sp.y_pix_size_um * factor
@@ -339,7 +339,7 @@ class SegGeometryCspad2x1V1(SegGeometry):
 
 
     def pixel_mask_array(sp, mbits=0o377, width=1, wcentral=1, **kwa):
-        """ Returns numpy array of pixel mask: 1/0 = ok/masked,
+        """ Returns read-only numpy array of pixel mask: 1/0 = ok/masked, evaluated once per (mbits, width, wcentral),
 
         Parameters
 
@@ -352,6 +352,12 @@ class SegGeometryCspad2x1V1(SegGeometry):
         width (uint) - width in pixels of masked edge
         wcentral (uint) - width in pixels of masked central columns
         """
+        return sp.cached_mask_array(sp._make_pixel_mask_array, mbits, width, wcentral)
+
+
+    def _make_pixel_mask_array(sp, mbits, width, wcentral):
+        """ Returns new numpy array of pixel mask, see pixel_mask_array
+        """
         mask = np.ones((sp._rows,sp._cols),dtype=np.uint8)
         w = width    # kwargs.get('width', 1)
         u = wcentral # kwargs.get('wcentral', 1)
@@ -374,35 +380,23 @@ class SegGeometryCspad2x1V1(SegGeometry):
             mask[:,h:h+u] = zero_cols # mask central-right columns
 
         if mbits & 4 or mbits & 8 or mbits & 16:
-            # mask non-bonded pixels
-            for p in range(0, sp._rows, 10):
-
-                if mbits & 16:
-                    # mask eight neighbours of nonbonded pixels
-                    if p==0:
-                        mask[0:2,0:2] = 0
-                        mask[0:2,h:2+h] = 0
-                    else:
-                        mask[p-1:p+2,p-1:p+2] = 0
-                        mask[p-1:p+2,p-1+h:p+2+h] = 0
-
-                elif mbits & 8:
-                    # mask nearest four neighbours of nonbonded pixels
-                    if p==0:
-                        mask[1,0] = 0
-                        mask[0,1] = 0
-                        mask[1,0+h] = 0
-                        mask[0,1+h] = 0
-                    else:
-                        mask[p-1:p+2,p] = 0
-                        mask[p,p-1:p+2] = 0
-                        mask[p-1:p+2,p+h] = 0
-                        mask[p,p+h-1:p+h+2] = 0
-
-                elif mbits & 4:
-                # mask nonbonded pixels
-                    mask[p,p] = 0
-                    mask[p,p+h] = 0
+            # mask non-bonded pixels (p,p) and (p,p+h), p = 0, 10, 20,..., or their neighbours
+            if mbits & 16:
+                # eight neighbours of nonbonded pixels
+                dr, dc = np.mgrid[-1:2,-1:2]
+            elif mbits & 8:
+                # nearest four neighbours of nonbonded pixels
+                dr, dc = np.array((-1,0,0,0,1)), np.array((0,-1,0,1,0))
+            else:
+                dr, dc = np.zeros(1, dtype=np.int64), np.zeros(1, dtype=np.int64)
+            p = np.arange(0, sp._rows, 10).reshape(-1,1)
+            r = (p + dr.ravel()).ravel()
+            c = (p + dc.ravel()).ravel()
+            sel = (r>=0) & (c>=0)
+            if not mbits & 16 and mbits & 8:
+                sel &= (r>0) | (c>0) # pixel (0,0) itself is not masked in this mode
+            mask[r[sel], c[sel]] = 0
+            mask[r[sel], c[sel]+h] = 0
 
         return mask
 
@@ -429,8 +423,10 @@ class SegGeometryCspad2x1V1(SegGeometry):
         return sp._name
 
 
-cspad2x1_one = SegGeometryCspad2x1V1(use_wide_pix_center=False)
-cspad2x1_wpc = SegGeometryCspad2x1V1(use_wide_pix_center=True)
+# singletons cspad2x1_one, cspad2x1_wpc are created on first access
+__getattr__ = lazy_singletons(globals(), SegGeometryCspad2x1V1,\
+                              {'cspad2x1_one': dict(use_wide_pix_center=False),\
+                               'cspad2x1_wpc': dict(use_wide_pix_center=True)})
 
 #----------- TEST -------------
 
@@ -140,8 +140,8 @@ class SegGeometryEpix10kaV1(SegGeometry):
         if sp.use_wide_pix_center: y_rhs[0] = sp._pixwh # set y-coordinate of the wide pixel in its geometry center
         sp.y_arr_um = np.hstack([y_rhs[::-1], -y_rhs]) # reverse sign (+y is opposite to y index)
 
-        sp.x_pix_arr_um, sp.y_pix_arr_um  = np.meshgrid(sp.x_arr_um, sp.y_arr_um)
-        sp.z_pix_arr_um = np.zeros((sp._rows,sp._cols))
+        sp.x_pix_arr_um, sp.y_pix_arr_um  = meshgrid_views(sp.x_arr_um, sp.y_arr_um)
+        sp.z_pix_arr_um = np.broadcast_to(0., (sp._rows, sp._cols))
 
 
     def make_pixel_size_arrs(sp):
@@ -157,8 +157,8 @@ class SegGeometryEpix10kaV1(SegGeometry):
         y_rhs_size_um[0] = sp._pixw
         y_arr_size_um = np.hstack([y_rhs_size_um[::-1],y_rhs_size_um])
 
-        sp.x_pix_size_um, sp.y_pix_size_um = np.meshgrid(x_arr_size_um, y_arr_size_um)
-        sp.z_pix_size_um = np.ones((sp._rows,sp._cols)) * sp._pixd
+        sp.x_pix_size_um, sp.y_pix_size_um = meshgrid_views(x_arr_size_um, y_arr_size_um)
+        sp.z_pix_size_um = np.broadcast_to(float(sp._pixd), (sp._rows, sp._cols))
 
         factor = 1./(sp._pixs*sp._pixs)
         sp.pix_area_arr = sp.x_pix_size_um * sp.y_pix_size_um * factor
@@ -347,7 +347,7 @@ class SegGeometryEpix10kaV1(SegGeometry):
 
 
     def pixel_mask_array(sp, mbits=0o377, width=1, wcentral=1, **kwa):
-        """ Returns numpy array of pixel mask: 1/0 = ok/masked,
+        """ Returns read-only numpy array of pixel mask: 1/0 = ok/masked, evaluated once per (mbits, width, wcentral),
 
         Parameters
 
@@ -358,6 +358,12 @@ class SegGeometryEpix10kaV1(SegGeometry):
         width (uint) - width in pixels of masked edge
         wcentral (uint) - width in pixels of masked central rows and columns
         """
+        return sp.cached_mask_array(sp._make_pixel_mask_array, mbits, width, wcentral)
+
+
+    def _make_pixel_mask_array(sp, mbits, width, wcentral):
+        """ Returns new numpy array of pixel mask, see pixel_mask_array
+        """
         w = width    # kwargs.get('width', 1)
         u = wcentral # kwargs.get('wcentral', 1)
 
@@ -412,8 +418,10 @@ class SegGeometryEpix10kaV1(SegGeometry):
         return sp._name
 
 
-epix10ka_one = SegGeometryEpix10kaV1(use_wide_pix_center=False)
-epix10ka_wpc = SegGeometryEpix10kaV1(use_wide_pix_center=True)
+# singletons epix10ka_one, epix10ka_wpc are created on first access
+__getattr__ = lazy_singletons(globals(), SegGeometryEpix10kaV1,\
+                              {'epix10ka_one': dict(use_wide_pix_center=False),\
+                               'epix10ka_wpc': dict(use_wide_pix_center=True)})
 
 #----------- TEST -------------
 
@@ -13,7 +13,8 @@ If you use all or part of it, please give an appropriate acknowledgment.
 Created on 2021-10-05 by Mikhail Dubrovin
 """
 
-from PSCalib.SegGeometryEpix10kaV1 import *
+from PSCalib.SegGeometryEpix10kaV1 import SegGeometryEpix10kaV1, lazy_singletons, logging
+from importlib import import_module
 logger = logging.getLogger(__name__)
 
 
@@ -47,8 +48,11 @@ class SegGeometryEpix10kaV2(SegGeometryEpix10kaV1):
         SegGeometryEpix10kaV1.__init__(sp, **kwa)
 
 
-epix10kav2_one = SegGeometryEpix10kaV2(use_wide_pix_center=False)
-epix10kav2_wpc = SegGeometryEpix10kaV2(use_wide_pix_center=True)
+# singletons epix10kav2_one, epix10kav2_wpc are created on first access
+__getattr__ = lazy_singletons(globals(), SegGeometryEpix10kaV2,\
+                              {'epix10kav2_one': dict(use_wide_pix_center=False),\
+                               'epix10kav2_wpc': dict(use_wide_pix_center=True)},\
+                              base=import_module('PSCalib.SegGeometryEpix10kaV1'))
 
 #----------- TEST -------------
 
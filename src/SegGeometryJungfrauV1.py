@@ -138,8 +138,8 @@ class SegGeometryJungfrauV1(SegGeometry):
         y0 = np.array((256.5, -1.5))*sp._pixs
         sp.y_arr_um = np.hstack([y0[0]-y_asic, y0[1]-y_asic])
 
-        sp.x_pix_arr_um, sp.y_pix_arr_um  = np.meshgrid(sp.x_arr_um, sp.y_arr_um)
-        sp.z_pix_arr_um = np.zeros((sp._rows, sp._cols))
+        sp.x_pix_arr_um, sp.y_pix_arr_um  = meshgrid_views(sp.x_arr_um, sp.y_arr_um)
+        sp.z_pix_arr_um = np.broadcast_to(0., (sp._rows, sp._cols))
 
 
     def make_pixel_size_arrs(sp):
@@ -148,9 +148,9 @@ class SegGeometryJungfrauV1(SegGeometry):
         if sp.pix_area_arr is None:
            sh = (sp._rows, sp._cols)
 
-           sp.x_pix_size_um = np.ones(sh)*sp._pixs
-           sp.y_pix_size_um = np.ones(sh)*sp._pixs
-           sp.z_pix_size_um = np.ones(sh)*sp._pixd
+           sp.x_pix_size_um = np.broadcast_to(float(sp._pixs), sh)
+           sp.y_pix_size_um = np.broadcast_to(float(sp._pixs), sh)
+           sp.z_pix_size_um = np.broadcast_to(float(sp._pixd), sh)
            sp.pix_area_arr  = np.ones(sh)
 
 
@@ -334,7 +334,7 @@ class SegGeometryJungfrauV1(SegGeometry):
 
 
     def pixel_mask_array(sp, mbits=0o377, width=1, wcentral=1, **kwa):
-        """ Returns numpy array of pixel mask: 1/0 = ok/masked,
+        """ Returns read-only numpy array of pixel mask: 1/0 = ok/masked, evaluated once per (mbits, width, wcentral),
 
         Parameters
 
@@ -345,6 +345,12 @@ class SegGeometryJungfrauV1(SegGeometry):
         width (uint) - width in pixels of masked edge
         wcentral (uint) - width in pixels of masked central rows and columns
         """
+        return sp.cached_mask_array(sp._make_pixel_mask_array, mbits, width, wcentral)
+
+
+    def _make_pixel_mask_array(sp, mbits, width, wcentral):
+        """ Returns new numpy array of pixel mask, see pixel_mask_array
+        """
         w = width
         u = wcentral # kwargs.get('wcentral', 1)
         #mbits = kwargs.get('mbits', 0o377)
@@ -400,7 +406,8 @@ class SegGeometryJungfrauV1(SegGeometry):
         return sp._name
 
 
-jungfrau_one = SegGeometryJungfrauV1()
+# singleton jungfrau_one is created on first access
+__getattr__ = lazy_singletons(globals(), SegGeometryJungfrauV1, {'jungfrau_one': {}})
 
 #----------- TEST -------------
 
@@ -411,6 +418,8 @@ if __name__ == "__main__":
 
   logging.basicConfig(format='[%(levelname).1s] L%(lineno)04d: %(message)s', level=logging.DEBUG)
 
+  jungfrau_one = SegGeometryJungfrauV1()
+
   def test_xyz_min_max():
     w = jungfrau_one
     w.print_xyz_min_max_um()
@@ -85,7 +85,8 @@ Created: 2017-10-12 by Mikhail Dubrovin
 2020-09-04 - converted to py3
 """
 
-from PSCalib.SegGeometryJungfrauV1 import * # SegGeometryJungfrauV1, logging, np
+from PSCalib.SegGeometryJungfrauV1 import SegGeometryJungfrauV1, lazy_singletons, meshgrid_views, logging, np
+from importlib import import_module
 logger = logging.getLogger(__name__)
 
 
@@ -112,8 +113,8 @@ class SegGeometryJungfrauV2(SegGeometryJungfrauV1):
         y0 = np.array((-256.5, 1.5))*sp._pixs
         sp.y_arr_um = np.hstack([y0[0]+y_asic, y0[1]+y_asic])
 
-        sp.x_pix_arr_um, sp.y_pix_arr_um  = np.meshgrid(sp.x_arr_um, sp.y_arr_um)
-        sp.z_pix_arr_um = np.zeros((sp._rows, sp._cols))
+        sp.x_pix_arr_um, sp.y_pix_arr_um  = meshgrid_views(sp.x_arr_um, sp.y_arr_um)
+        sp.z_pix_arr_um = np.broadcast_to(0., (sp._rows, sp._cols))
 
 
     def get_xyz_min_um(sp):
@@ -123,7 +124,9 @@ class SegGeometryJungfrauV2(SegGeometryJungfrauV1):
         return sp.x_arr_um[-1], sp.y_arr_um[-1], 0
 
 
-jungfrau_front = SegGeometryJungfrauV2()
+# singleton jungfrau_front is created on first access
+__getattr__ = lazy_singletons(globals(), SegGeometryJungfrauV2, {'jungfrau_front': {}},\
+                              base=import_module('PSCalib.SegGeometryJungfrauV1'))
 
 
 #----------- TEST -------------
@@ -135,6 +138,8 @@ if __name__ == "__main__":
 
   logging.basicConfig(format='[%(levelname).1s] L%(lineno)04d: %(message)s', level=logging.DEBUG)
 
+  jungfrau_front = SegGeometryJungfrauV2()
+
   def test_xyz_min_max():
     w = jungfrau_front
     w.print_xyz_min_max_um()
@@ -141,8 +141,8 @@ class SegGeometryMatrixV1(SegGeometry):
 
         # Arguments x and y are swapped in order to get grids for "matrix" coordinate system
         # where X is directed from up to down, Y from left to right
-        sp.y_pix_arr_um, sp.x_pix_arr_um = np.meshgrid(sp.y_arr_um, sp.x_arr_um)
-        sp.z_pix_arr_um = np.zeros((sp._rows,sp._cols))
+        sp.y_pix_arr_um, sp.x_pix_arr_um = meshgrid_views(sp.y_arr_um, sp.x_arr_um)
+        sp.z_pix_arr_um = np.broadcast_to(0., (sp._rows, sp._cols))
 
 
     def make_pixel_size_arrs(sp):
@@ -153,8 +153,8 @@ class SegGeometryMatrixV1(SegGeometry):
         x_arr_size_um = np.ones(sp._rows) * sp._pix_size_rows
         y_arr_size_um = np.ones(sp._cols) * sp._pix_size_cols
 
-        sp.y_pix_size_um, sp.x_pix_size_um = np.meshgrid(y_arr_size_um, x_arr_size_um)
-        sp.z_pix_size_um = np.ones((sp._rows,sp._cols)) * sp._pix_size_depth
+        sp.y_pix_size_um, sp.x_pix_size_um = meshgrid_views(y_arr_size_um, x_arr_size_um)
+        sp.z_pix_size_um = np.broadcast_to(float(sp._pix_size_depth), (sp._rows, sp._cols))
 
         sp.pix_area_arr = np.ones((sp._rows,sp._cols))
 
@@ -350,12 +350,18 @@ class SegGeometryMatrixV1(SegGeometry):
 
 
     def pixel_mask_array(sp, mbits=0o377, width=1, **kwa):
-        """ Returns numpy array of pixel mask: 1/0 = ok/masked,
+        """ Returns read-only numpy array of pixel mask: 1/0 = ok/masked, evaluated once per (mbits, width),
         mbits=1 - mask edges,
         +2 - mask two central columns,
         +4 - mask non-bonded pixels,
         +8 - mask nearest neighbours of nonbonded pixels.
         """
+        return sp.cached_mask_array(sp._make_pixel_mask_array, mbits, width)
+
+
+    def _make_pixel_mask_array(sp, mbits, width, wcentral=1):
+        """ Returns new numpy array of pixel mask, see pixel_mask_array
+        """
         w = width
         zero_col = np.zeros((sp._rows,w),dtype=np.uint8)
         zero_row = np.zeros((w,sp._cols),dtype=np.uint8)
@@ -393,7 +399,8 @@ class SegGeometryMatrixV1(SegGeometry):
         return sp._name
 
 
-segment_one = SegGeometryMatrixV1()
+# singleton segment_one is created on first access
+__getattr__ = lazy_singletons(globals(), SegGeometryMatrixV1, {'segment_one': {}})
 
 #----------- TEST -------------
 
@@ -401,6 +408,8 @@ if __name__ == "__main__":
 
   FIGSIZE_INCH = (9,8)
 
+  segment_one = SegGeometryMatrixV1()
+
   def test_xyz_min_max():
     w = segment_one
     w.print_xyz_min_max_um()
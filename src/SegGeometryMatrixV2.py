@@ -135,8 +135,8 @@ class SegGeometryMatrixV2(SegGeometry):
         sp.x_arr_um = (np.arange(sp._cols)-float(sp._cols-1)/2)*sp._pix_size_cols
         sp.y_arr_um = (np.arange(sp._rows)-float(sp._rows-1)/2)*(-sp._pix_size_rows)
 
-        sp.x_pix_arr_um, sp.y_pix_arr_um = np.meshgrid(sp.x_arr_um, sp.y_arr_um)
-        sp.z_pix_arr_um = np.zeros((sp._rows, sp._cols))
+        sp.x_pix_arr_um, sp.y_pix_arr_um = meshgrid_views(sp.x_arr_um, sp.y_arr_um)
+        sp.z_pix_arr_um = np.broadcast_to(0., (sp._rows, sp._cols))
 
 
     def make_pixel_size_arrs(sp):
@@ -147,8 +147,8 @@ class SegGeometryMatrixV2(SegGeometry):
         x_arr_size_um = np.ones(sp._cols) * sp._pix_size_cols
         y_arr_size_um = np.ones(sp._rows) * sp._pix_size_rows
 
-        sp.x_pix_size_um, sp.y_pix_size_um = np.meshgrid(x_arr_size_um, y_arr_size_um)
-        sp.z_pix_size_um = np.ones((sp._rows, sp._cols)) * sp._pix_size_depth
+        sp.x_pix_size_um, sp.y_pix_size_um = meshgrid_views(x_arr_size_um, y_arr_size_um)
+        sp.z_pix_size_um = np.broadcast_to(float(sp._pix_size_depth), (sp._rows, sp._cols))
 
         sp.pix_area_arr = np.ones((sp._rows, sp._cols))
 
@@ -344,12 +344,18 @@ class SegGeometryMatrixV2(SegGeometry):
 
 
     def pixel_mask_array(sp, mbits=0o377, width=1, **kwa):
-        """ Returns numpy array of pixel mask: 1/0 = ok/masked,
+        """ Returns read-only numpy array of pixel mask: 1/0 = ok/masked, evaluated once per (mbits, width),
         mbits=1 - mask edges,
         +2 - mask two central columns,
         +4 - mask non-bonded pixels,
         +8 - mask nearest neighbours of nonbonded pixels.
         """
+        return sp.cached_mask_array(sp._make_pixel_mask_array, mbits, width)
+
+
+    def _make_pixel_mask_array(sp, mbits, width, wcentral=1):
+        """ Returns new numpy array of pixel mask, see pixel_mask_array
+        """
         w = width
         zero_col = np.zeros((sp._rows,w),dtype=np.uint8)
         zero_row = np.zeros((w,sp._cols),dtype=np.uint8)
@@ -387,7 +393,8 @@ class SegGeometryMatrixV2(SegGeometry):
         return sp._name
 
 
-segment_one_v2 = SegGeometryMatrixV2()
+# singleton segment_one_v2 is created on first access
+__getattr__ = lazy_singletons(globals(), SegGeometryMatrixV2, {'segment_one_v2': {}})
 #seg_andor3d = SegGeometryMatrixV2(rows=2048, cols=2048, pix_size_rows=13.5,\
 #                pix_size_cols=13.5, pix_size_depth=50, pix_scale_size=13.5)
 
@@ -397,6 +404,8 @@ if __name__ == "__main__":
 
   FIGSIZE_INCH = (9,8)
 
+  segment_one_v2 = SegGeometryMatrixV2()
+
   def test_xyz_min_max():
     w = segment_one_v2
     w.print_xyz_min_max_um()
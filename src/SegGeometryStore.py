@@ -20,6 +20,9 @@ Usage::
     sg = sgs.Create(segname='MTRX:512:512:54:54')
     sg = sgs.Create(segname='MTRX:V2:512:512:54:54')
 
+    # MTRX objects are shared between segments with the same segname and their arrays are read-only
+    sgs.set_mtrx_max_items(64) # bound on number of cached MTRX objects, default 32
+
     sg.print_seg_info(pbits=0o377)
     size_arr = sg.size()
     rows     = sg.rows()
@@ -32,6 +35,7 @@ Usage::
     sizeX, sizeY, sizeZ = sg.pixel_size_array()
     X        = sg.pixel_coord_array('X')
     X,Y,Z    = sg.pixel_coord_array()
+    x,y,z    = sg.pixel_coord_axes() # separable coordinates of shapes broadcastable to sg.shape()
     xmin = sg.pixel_coord_min('X')
     ymax = sg.pixel_coord_max('Y')
     xmin, ymin, zmin = sg.pixel_coord_min()
@@ -51,6 +55,9 @@ See:
  * :py:class:`SegGeometryMatrixV2`,
  * :py:class:`SegGeometryStore`
 
+Segment modules are imported and their singleton objects are created on first request of segname,
+this lazy loading requires python 3.7 or later (module-level __getattr__, PEP 562).
+
 For more detail see `Detector Geometry <https://confluence.slac.stanford.edu/display/PSDM/Detector+Geometry>`_.
 
 This software was developed for the SIT project.
@@ -64,22 +71,49 @@ from __future__ import print_function
 import logging
 logger = logging.getLogger(__name__)
 
-from PSCalib.SegGeometryCspad2x1V1 import cspad2x1_one, cspad2x1_wpc
-from PSCalib.SegGeometryEpix100V1  import epix2x2_one, epix2x2_wpc
-from PSCalib.SegGeometryEpix10kaV1 import epix10ka_one, epix10ka_wpc
-from PSCalib.SegGeometryEpix10kaV2 import epix10kav2_one, epix10kav2_wpc
-from PSCalib.SegGeometryMatrixV1   import SegGeometryMatrixV1, segment_one, matrix_pars
-from PSCalib.SegGeometryMatrixV2   import SegGeometryMatrixV2, matrix_pars_v2
-from PSCalib.SegGeometryJungfrauV1 import jungfrau_one
-from PSCalib.SegGeometryJungfrauV2 import jungfrau_front
+from importlib import import_module
+from threading import Lock
+import numpy as np
+from PSCalib.UtilsCache import LRUCache
+
+# segname: (module, name of singleton, name of singleton with use_wide_pix_center=True)
+SEGMENT_REGISTRY = {
+  'SENS2X1:V1' : ('PSCalib.SegGeometryCspad2x1V1', 'cspad2x1_one',   'cspad2x1_wpc'),
+  'EPIX100:V1' : ('PSCalib.SegGeometryEpix100V1',  'epix2x2_one',    'epix2x2_wpc'),
+  'EPIX10KA:V1': ('PSCalib.SegGeometryEpix10kaV1', 'epix10ka_one',   'epix10ka_wpc'),
+  'EPIX10KA:V2': ('PSCalib.SegGeometryEpix10kaV2', 'epix10kav2_one', 'epix10kav2_wpc'),
+  'PNCCD:V1'   : ('PSCalib.SegGeometryMatrixV1',   'segment_one',    'segment_one'),
+  'JUNGFRAU:V1': ('PSCalib.SegGeometryJungfrauV1', 'jungfrau_one',   'jungfrau_one'),
+  'JUNGFRAU:V2': ('PSCalib.SegGeometryJungfrauV2', 'jungfrau_front', 'jungfrau_front'),
+ #'ANDOR3D:V1' : ('PSCalib.SegGeometryMatrixV2',   'seg_andor3d',    'seg_andor3d'),
+}
+
+
+def set_arrays_read_only(sg):
+    """Sets all numpy array attributes of the segment object sg read-only.
+    """
+    for v in vars(sg).values():
+        if isinstance(v, np.ndarray): v.setflags(write=False)
+    return sg
 
 
 class SegGeometryStore(object):
-    """Factory class for SegGeometry-base objects of different detectors"""
+    """Factory class for SegGeometry-base objects of different detectors.
+       Segment modules are imported and singleton objects are created on first request of segname.
+       MTRX objects are kept in bounded LRU cache per (segname, use_wide_pix_center).
+    """
 
 
-    def __init__(sp):
-        pass
+    def __init__(sp, mtrx_max_items=32):
+        sp.mtrx_cache = LRUCache(maxitems=mtrx_max_items)
+        sp._lock = Lock()
+
+
+    def set_mtrx_max_items(sp, mtrx_max_items):
+        """Sets maximal number of cached MTRX objects.
+        """
+        with sp._lock:
+            sp.mtrx_cache.resize(maxitems=mtrx_max_items)
 
 
     def Create(sp, **kwa):
@@ -88,25 +122,37 @@ class SegGeometryStore(object):
         segname = kwa.get('segname', 'SENS2X1:V1')
         wpc     = kwa.get('use_wide_pix_center', False)
 
-        if segname=='SENS2X1:V1' : return cspad2x1_wpc if wpc else cspad2x1_one # SegGeometryCspad2x1V1(use_wide_pix_center=False)
-        if segname=='EPIX100:V1' : return epix2x2_wpc  if wpc else epix2x2_one  # SegGeometryEpix100V1 (use_wide_pix_center=False)
-        if segname=='EPIX10KA:V1': return epix10ka_wpc if wpc else epix10ka_one # SegGeometryEpix10kaV1(use_wide_pix_center=False)
-        if segname=='EPIX10KA:V2': return epix10kav2_wpc if wpc else epix10kav2_one # SegGeometryEpix10kaV2
-        if segname=='PNCCD:V1'   : return segment_one  # SegGeometryMatrixV1()
+        reg = SEGMENT_REGISTRY.get(segname)
+        if reg is not None:
+            modname, name_one, name_wpc = reg
+            return getattr(import_module(modname), name_wpc if wpc else name_one)
+        if segname[:4]=='MTRX':
+            key = (segname, wpc)
+            with sp._lock:
+                sg = sp.mtrx_cache.get(key)
+                if sg is None:
+                    sg = sp._create_mtrx(segname)
+                    sg.make_pixel_size_arrs()
+                    sg = sp.mtrx_cache.put(key, set_arrays_read_only(sg))
+            return sg
+        return None
+
+
+    def _create_mtrx(sp, segname):
+        """Returns new matrix segment object for segname MTRX:<rows>:<cols>:<psize_row>:<psize_col>
+           or MTRX:V2:<rows>:<cols>:<psize_row>:<psize_col>.
+        """
         if segname[:7]=='MTRX:V2':
+            from PSCalib.SegGeometryMatrixV2 import SegGeometryMatrixV2, matrix_pars_v2
             rows, cols, psize_row, psize_col = matrix_pars_v2(segname)
             return SegGeometryMatrixV2(rows, cols, psize_row, psize_col,\
                                        pix_size_depth=100,\
                                        pix_scale_size=min(psize_row, psize_col))
-        if segname[:4]=='MTRX':
-            rows, cols, psize_row, psize_col = matrix_pars(segname)
-            return SegGeometryMatrixV1(rows, cols, psize_row, psize_col,\
-                                       pix_size_depth=100,\
-                                       pix_scale_size=min(psize_row, psize_col))
-        if segname=='JUNGFRAU:V1': return jungfrau_one    # SegGeometryJungfrauV1()
-        if segname=='JUNGFRAU:V2': return jungfrau_front  # SegGeometryJungfrauV2()
-        #if segname=='ANDOR3D:V1': return seg_andor3d     # SegGeometryMatrixV1()
-        return None
+        from PSCalib.SegGeometryMatrixV1 import SegGeometryMatrixV1, matrix_pars
+        rows, cols, psize_row, psize_col = matrix_pars(segname)
+        return SegGeometryMatrixV1(rows, cols, psize_row, psize_col,\
+                                   pix_size_depth=100,\
+                                   pix_scale_size=min(psize_row, psize_col))
 
 
 sgs = SegGeometryStore()
@@ -0,0 +1,175 @@
+#!/usr/bin/env python
+
+"""
+Class :py:class:`SparseImageRenderer` - area-weighted sub-pixel image rendering
+===============================================================================
+
+Detector pixels are split between image pixels proportionally to their overlap.
+Overlap fractions are evaluated once by sub-sampling of each pixel footprint
+(nsub x nsub points inside the pixel of size from :py:meth:`SegGeometry.pixel_size_array`,
+transformed through the full geometry with tilts) and stored in a sparse CSR matrix
+of shape (<image-size>, <number-of-detector-pixels>).
+Each event is rendered with a single sparse matrix-vector product.
+
+Requires scipy.
+
+Usage::
+
+    from PSCalib.GeometryAccess import GeometryAccess
+    from PSCalib.SparseImageRenderer import SparseImageRenderer
+
+    # use_wide_pix_center=True places wide pixel coordinates in their geometrical center,
+    # that is required for correct footprints of wide pixels
+    geometry = GeometryAccess(fname_geometry, use_wide_pix_center=True)
+    sir = SparseImageRenderer(geometry, pix_scale_size_um=None, xy0_off_pix=None, do_tilt=True, cframe=0,\
+                              nsub=3, mask=None, dtype=np.float32, vbase=0)
+
+    img  = sir.image(nda)                  # sum of intensity fractions in image pixels
+    img  = sir.image(nda, normalize=True)  # normalized by detector pixel coverage of image pixels
+    imgs = sir.images(ndas)                # for stack of events ndas.shape=(N,<data-shape>)
+
+    A = sir.matrix         # scipy.sparse.csr_matrix
+    cov = sir.coverage()   # (rows,cols) sum of detector pixel fractions in image pixels
+    shape = sir.shape      # image shape, the same as for ImageAssembler with the same parameters
+
+See:
+ * :py:class:`GeometryAccess`
+ * :py:class:`ImageAssembler`
+
+This software was developed for the SIT project.
+If you use all or part of it, please give an appropriate acknowledgment.
+
+Created: 2026-10-16
+"""
+from __future__ import print_function
+from __future__ import division
+
+import logging
+logger = logging.getLogger(__name__)
+
+import numpy as np
+
+
+class SparseImageRenderer(object):
+    """Renders images with sparse resampling matrix of detector pixel to image pixel overlap fractions.
+
+    Parameters
+
+    - geo : :py:class:`GeometryAccess` - geometry object
+    - oname, oindex, pix_scale_size_um, xy0_off_pix, do_tilt, cframe - the same as in
+      :py:meth:`GeometryAccess.get_pixel_coord_indexes`
+    - nsub : int - number of sub-pixel samples per pixel in each direction
+    - mask : np.array - detector pixel weights of data shape, e.g. mask of good pixels, None - all 1
+    - dtype : np.dtype - image data type
+    - vbase : float - value of image pixels not covered by detector pixels
+    """
+
+    def __init__(self, geo, oname=None, oindex=0, pix_scale_size_um=None, xy0_off_pix=None, do_tilt=True, cframe=0,\
+                 nsub=3, mask=None, dtype=np.float32, vbase=0):
+        import scipy.sparse as sps
+
+        self.dtype = dtype
+        self.vbase = vbase
+
+        X, Y, Z = geo.get_pixel_coords(oname, oindex, do_tilt, cframe)
+        rows, cols = geo.get_pixel_coord_indexes(oname, oindex, pix_scale_size_um, xy0_off_pix, do_tilt, cframe)
+        self.data_shape = X.shape
+        self.npixels = npix = X.size
+        self.shape = nrows, ncols = (int(rows.max())+1, int(cols.max())+1)
+
+        gobj = geo.get_top_geo() if oname is None else geo.get_geo(oname, oindex)
+        offsets = (np.arange(nsub) + 0.5)/nsub - 0.5
+
+        list_inds, list_pixs = [], []
+        for du in offsets:
+            for dv in offsets:
+                def seg_coords(sg, du=du, dv=dv):
+                    xac, yac, zac = sg.pixel_coord_array()
+                    sx, sy, sz = sg.pixel_size_array()
+                    return xac + du*sx, yac + dv*sy, zac
+
+                x, y, z = gobj.get_pixel_coords(do_tilt, seg_coords=seg_coords)
+                if cframe>0: x, y, z = geo.coords_psana_to_lab_frame(x, y, z)
+                r, c = geo.xy_to_rc_arrays(x.ravel(), y.ravel(), pix_scale_size_um, xy0_off_pix, cframe,\
+                                           xy_ref=(X, Y), fract=True)
+                ir, ic = np.floor(r), np.floor(c)
+                valid = (ir>=0) & (ir<nrows) & (ic>=0) & (ic<ncols)
+                list_inds.append((ir[valid]*ncols + ic[valid]).astype(np.int64))
+                list_pixs.append(np.flatnonzero(valid))
+
+        inds = np.hstack(list_inds)
+        pixs = np.hstack(list_pixs)
+        data = np.ones(inds.size, dtype=dtype) / (nsub*nsub)
+        if mask is not None: data *= mask.ravel()[pixs]
+
+        self.matrix = sps.csr_matrix((data, (inds, pixs)), shape=(nrows*ncols, npix))
+        self.matrix.sum_duplicates()
+        self._coverage = None
+        logger.debug('SparseImageRenderer matrix shape: %s nnz: %d' % (str(self.matrix.shape), self.matrix.nnz))
+
+
+    def coverage(self):
+        """Returns (rows,cols) array of sums of detector pixel fractions in image pixels.
+        """
+        if self._coverage is None:
+            self._coverage = np.asarray(self.matrix.sum(axis=1), dtype=self.dtype).reshape(self.shape)
+        return self._coverage
+
+
+    def _finalize(self, flat, normalize):
+        cov = self.coverage().ravel()
+        empty = cov==0
+        if normalize:
+            np.divide(flat, cov, out=flat, where=~empty)
+        flat[empty] = self.vbase
+        return flat
+
+
+    def image(self, nda, normalize=False):
+        """Returns image rendered from data array nda.
+
+           normalize - if True, image pixels are divided by their detector pixel coverage.
+        """
+        if nda.size != self.npixels:
+            raise ValueError('SparseImageRenderer: data size %d is different from number of pixels in geometry %d'%\
+                             (nda.size, self.npixels))
+        flat = self.matrix.dot(nda.ravel().astype(self.dtype, copy=False)).astype(self.dtype, copy=False)
+        return self._finalize(flat, normalize).reshape(self.shape)
+
+
+    def images(self, ndas, normalize=False):
+        """Returns stack of images of shape (N,rows,cols) for stack of N data arrays of shape (N,<data-shape>).
+        """
+        if ndas.size % self.npixels:
+            raise ValueError('SparseImageRenderer: data stack size %d is not multiple of number of pixels in geometry %d'%\
+                             (ndas.size, self.npixels))
+        nevts = ndas.size // self.npixels
+        flat = self.matrix.dot(ndas.reshape(nevts, -1).astype(self.dtype, copy=False).T).T
+        flat = np.ascontiguousarray(flat, dtype=self.dtype)
+        cov = self.coverage().ravel()
+        empty = cov==0
+        if normalize:
+            np.divide(flat, cov, out=flat, where=~empty)
+        flat[:,empty] = self.vbase
+        return flat.reshape((nevts,) + self.shape)
+
+
+if __name__ == "__main__":
+    import sys
+    from time import time
+    logging.basicConfig(format='[%(levelname).1s] L%(lineno)04d: %(message)s', level=logging.DEBUG)
+    from PSCalib.GeometryAccess import GeometryAccess
+
+    fname_geometry = sys.argv[1] if len(sys.argv) > 1 else 'geometry.txt'
+    geometry = GeometryAccess(fname_geometry, use_wide_pix_center=True)
+    t0_sec = time()
+    sir = SparseImageRenderer(geometry)
+    logger.info('SparseImageRenderer initialization time %.3f sec' % (time()-t0_sec))
+    nda = np.ones(sir.data_shape, dtype=np.float32)
+    t0_sec = time()
+    img = sir.image(nda)
+    logger.info('image shape %s rendering time %.6f sec, sum of image: %.1f for %d pixels'%\
+                (str(img.shape), time()-t0_sec, img.sum(), nda.size))
+    sys.exit('END OF TEST')
+
+# EOF
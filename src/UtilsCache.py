@@ -0,0 +1,315 @@
+#!/usr/bin/env python
+
+"""
+:py:class:`UtilsCache` - caching utilities for geometry arrays
+==============================================================
+
+Usage::
+
+    from PSCalib.UtilsCache import LRUCache
+
+    cache = LRUCache(maxbytes=1000*2**20, maxitems=64)
+    cache.put(key, (X, Y, Z))
+    X, Y, Z = cache.get(key) # returns None if key is not in cache
+    cache.pop(key)
+    cache.clear()
+    s = cache.info()
+    nbytes = cache.nbytes()
+    nitems = len(cache)
+    cache.resize(maxbytes=500*2**20) # new budget, least recently used items are evicted to fit it
+
+    from PSCalib.UtilsCache import NpzDiskCache, hash_of_text
+
+    # on-disk cache of arrays in .npz files for geometry identified by hash of its text
+    dcache = NpzDiskCache(dirname, hash_of_text(geometry_text, use_wide_pix_center))
+    dcache.put(key, (X, Y, Z))
+    X, Y, Z = dcache.get(key) # returns None if file for key does not exist
+
+    from PSCalib.UtilsCache import ShmArrayCache
+
+    # arrays published in memory-mapped .npy files, e.g. in /dev/shm, and attached read-only by other processes
+    shm = ShmArrayCache('/dev/shm', hash_of_text(geometry_text, use_wide_pix_center))
+    X, Y, Z = shm.put(key, (X, Y, Z)) # returns read-only np.memmap arrays
+    X, Y, Z = shm.get(key) # returns None if arrays for key are not published
+    shm.remove_all()       # removes all files with cache prefix
+
+See:
+ * :py:class:`GeometryAccess`
+
+This software was developed for the SIT project.
+If you use all or part of it, please give an appropriate acknowledgment.
+
+Created: 2026-10-16
+"""
+
+import os
+import logging
+logger = logging.getLogger(__name__)
+
+import hashlib
+from collections import OrderedDict
+import numpy as np
+
+
+def size_of_value(v):
+    """Returns total number of bytes in numpy arrays of (nested) tuple, list, or dict value v.
+       Memory-mapped arrays are not counted.
+    """
+    if isinstance(v, np.memmap): return 0
+    if isinstance(v, np.ndarray): return v.nbytes
+    if isinstance(v, (tuple, list)): return sum([size_of_value(o) for o in v])
+    if isinstance(v, dict): return sum([size_of_value(o) for o in v.values()])
+    return 0
+
+
+_UNCHANGED = object() # default of LRUCache.resize parameters which are not changed
+
+
+class LRUCache(object):
+    """Bounded keyed cache with least-recently-used eviction.
+
+    Parameters
+
+    - maxbytes : int - memory budget for cached numpy arrays in bytes, None - unlimited
+    - maxitems : int - maximal number of cached items, None - unlimited
+    """
+
+    def __init__(self, maxbytes=None, maxitems=None):
+        self.maxbytes = maxbytes
+        self.maxitems = maxitems
+        self._dict = OrderedDict() # key: (value, nbytes)
+        self._nbytes = 0
+
+
+    def __len__(self):
+        return len(self._dict)
+
+
+    def __contains__(self, key):
+        return key in self._dict
+
+
+    def nbytes(self):
+        """Returns total number of bytes in cached arrays.
+        """
+        return self._nbytes
+
+
+    def get(self, key, default=None):
+        """Returns cached value for key and marks it as most recently used, or default.
+        """
+        item = self._dict.pop(key, None)
+        if item is None: return default
+        self._dict[key] = item
+        return item[0]
+
+
+    def put(self, key, value):
+        """Adds value to cache and evicts least recently used items to fit the budget.
+           Value which alone exceeds the memory budget is not cached.
+        """
+        self.pop(key)
+        nbytes = size_of_value(value)
+        if self.maxbytes is not None and nbytes > self.maxbytes:
+            logger.debug('value of %d bytes for key %s exceeds cache budget %d bytes - not cached'%\
+                         (nbytes, str(key), self.maxbytes))
+            return value
+        self._dict[key] = (value, nbytes)
+        self._nbytes += nbytes
+        self._evict()
+        return value
+
+
+    def pop(self, key, default=None):
+        """Removes key from cache and returns its value, or default.
+        """
+        item = self._dict.pop(key, None)
+        if item is None: return default
+        self._nbytes -= item[1]
+        return item[0]
+
+
+    def clear(self):
+        """Removes all items from cache.
+        """
+        self._dict.clear()
+        self._nbytes = 0
+
+
+    def keys(self):
+        """Returns list of keys ordered from least to most recently used.
+        """
+        return list(self._dict.keys())
+
+
+    def resize(self, maxbytes=_UNCHANGED, maxitems=_UNCHANGED):
+        """Sets new memory budget maxbytes and/or maximal number of items maxitems (None - unlimited)
+           and evicts least recently used items to fit them.
+        """
+        if maxbytes is not _UNCHANGED: self.maxbytes = maxbytes
+        if maxitems is not _UNCHANGED: self.maxitems = maxitems
+        self._evict()
+
+
+    def _evict(self):
+        while len(self._dict) > 1 and\
+          ((self.maxbytes is not None and self._nbytes > self.maxbytes) or\
+           (self.maxitems is not None and len(self._dict) > self.maxitems)):
+            key, (v, nbytes) = self._dict.popitem(last=False)
+            self._nbytes -= nbytes
+            logger.debug('evict from cache key: %s of %d bytes' % (str(key), nbytes))
+
+
+    def info(self):
+        """Returns (str) info about cache content.
+        """
+        s = 'LRUCache items: %d of %s  bytes: %d of %s' %\
+            (len(self._dict), str(self.maxitems), self._nbytes, str(self.maxbytes))
+        for k, (v, nbytes) in self._dict.items():
+            s += '\n  %12d  %s' % (nbytes, str(k))
+        return s
+
+
+def hash_of_text(*args):
+    """Returns (str) sha1 hex digest of str representations of args.
+    """
+    h = hashlib.sha1()
+    for a in args: h.update(str(a).encode('utf-8'))
+    return h.hexdigest()
+
+
+class NpzDiskCache(object):
+    """On-disk cache of numpy arrays and tuples of arrays in uncompressed .npz files.
+
+    Parameters
+
+    - dirname : str - cache directory, created if does not exist
+    - prefix : str - file name prefix, e.g. hash of the source of cached arrays
+    """
+
+    def __init__(self, dirname, prefix):
+        self.dirname = dirname
+        self.prefix = prefix
+
+
+    def fname(self, key):
+        """Returns file name for key.
+        """
+        return os.path.join(self.dirname, '%s-%s.npz' % (self.prefix, hash_of_text(key)[:16]))
+
+
+    def get(self, key):
+        """Returns array or tuple of arrays for key, or None if the file for key does not exist or is unreadable.
+        """
+        fname = self.fname(key)
+        if not os.path.exists(fname): return None
+        try:
+            with np.load(fname) as f:
+                if 'array' in f.files: return f['array']
+                return tuple(f['arr_%d' % i] for i in range(len(f.files)))
+        except Exception as err:
+            logger.warning('failed to load cache file %s: %s' % (fname, str(err)))
+            return None
+
+
+    def put(self, key, value):
+        """Saves array or tuple of arrays value for key and returns value.
+           File is written under temporary name and renamed, for concurrent writers.
+        """
+        fname = self.fname(key)
+        tmpname = '%s.%d.tmp' % (fname, os.getpid())
+        try:
+            if not os.path.exists(self.dirname):
+                try: os.makedirs(self.dirname)
+                except OSError: pass # may be created by concurrent process
+            with open(tmpname, 'wb') as f:
+                if isinstance(value, np.ndarray): np.savez(f, array=value)
+                else: np.savez(f, *value)
+            os.rename(tmpname, fname)
+            logger.debug('saved cache file %s for key %s' % (fname, str(key)))
+        except Exception as err:
+            logger.warning('failed to save cache file %s: %s' % (fname, str(err)))
+            if os.path.exists(tmpname): os.remove(tmpname)
+        return value
+
+
+class ShmArrayCache(object):
+    """Cache of numpy arrays and tuples of arrays in .npy files attached as read-only np.memmap.
+       Files in /dev/shm (tmpfs) are shared in memory by all processes of the node.
+
+    Parameters
+
+    - dirname : str - directory for files, e.g. /dev/shm
+    - prefix : str - file name prefix, e.g. hash of the source of cached arrays
+    """
+
+    def __init__(self, dirname='/dev/shm', prefix='geo'):
+        self.dirname = dirname
+        self.prefix = prefix
+
+
+    def fname(self, key):
+        """Returns base file name for key, array files have suffixes -<index>.npy, the list of files - .txt.
+        """
+        return os.path.join(self.dirname, '%s-%s' % (self.prefix, hash_of_text(key)[:16]))
+
+
+    def get(self, key):
+        """Returns read-only memory-mapped array or tuple of arrays for key, or None if they are not published.
+        """
+        fname = self.fname(key)
+        if not os.path.exists(fname + '.txt'): return None
+        try:
+            with open(fname + '.txt', 'r') as f:
+                kind, n = f.read().split()
+            arrs = tuple(np.load('%s-%d.npy' % (fname, i), mmap_mode='r') for i in range(int(n)))
+            return arrs[0] if kind == 'array' else arrs
+        except Exception as err:
+            logger.warning('failed to attach arrays %s: %s' % (fname, str(err)))
+            return None
+
+
+    def _rename_from_tmp(self, fname, write):
+        tmpname = '%s.%d.tmp' % (fname, os.getpid())
+        with open(tmpname, 'wb') as f: write(f)
+        os.rename(tmpname, fname)
+
+
+    def put(self, key, value):
+        """Publishes array or tuple of arrays value for key and returns attached read-only arrays.
+           The list of files is written after all arrays, so the value is either complete or not visible.
+           Returns value itself if publishing failed.
+        """
+        fname = self.fname(key)
+        single = isinstance(value, np.ndarray)
+        arrs = (value,) if single else value
+        try:
+            for i, a in enumerate(arrs):
+                self._rename_from_tmp('%s-%d.npy' % (fname, i), lambda f, a=a: np.save(f, a))
+            txt = '%s %d' % ('array' if single else 'tuple', len(arrs))
+            self._rename_from_tmp(fname + '.txt', lambda f: f.write(txt.encode('utf-8')))
+            logger.debug('published arrays %s for key %s' % (fname, str(key)))
+        except Exception as err:
+            logger.warning('failed to publish arrays %s: %s' % (fname, str(err)))
+            return value
+        v = self.get(key)
+        return value if v is None else v
+
+
+    def remove_all(self):
+        """Removes all files with cache prefix.
+        """
+        pattern = self.prefix + '-'
+        for name in os.listdir(self.dirname):
+            if name.startswith(pattern): os.remove(os.path.join(self.dirname, name))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(format='[%(levelname).1s] L%(lineno)04d: %(message)s', level=logging.DEBUG)
+    cache = LRUCache(maxbytes=3*800, maxitems=10)
+    for i in range(5): cache.put(('a', i), np.ones(100))
+    cache.get(('a', 2))
+    cache.put(('b', 0), np.ones(100))
+    logger.info(cache.info())
+
+# EOF
@@ -147,14 +147,11 @@ def geometry_to_crystfel(fname, ofname, cframe=CFRAME_LAB, zcorr_um=None):
     shape = (nsegs,) + seg.shape() # (nsegs, srows, scols)
     logger.info('geo shape %s' % str(shape))
 
-    x.shape = shape
-    y.shape = shape
-    z.shape = shape
+    x, y, z = [a.reshape(shape) for a in (x, y, z)]
 
     txt = header_crystfel()
     for n in range(nsegs):
-        z_um = z[n,:]
-        if zcorr_um is not None: z_um -= zcorr_um
+        z_um = z[n,:] if zcorr_um is None else z[n,:] - zcorr_um
         txt += panel_constants_to_crystfel(seg, n, x[n,:], y[n,:], z_um)
 
     logger.info('Geometry constants in CrystFEL format:\n\n%s\n...\n' % txt[:1000])
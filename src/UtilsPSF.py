@@ -128,7 +128,7 @@ def psf_from_geo(geo, cframe=CFRAME_LAB):
     nsegs = int(x.size/sego.size())
     shape = (nsegs, srows, scols)
     logger.debug('geo shape: %s' % str(shape))
-    x.shape = y.shape = z.shape = shape
+    x, y, z = [a.reshape(shape) for a in (x, y, z)]
 
     lst = None
     for n in range(nsegs):